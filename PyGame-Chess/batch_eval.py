@@ -0,0 +1,213 @@
+"""Пакетная оценка позиций на NumPy.
+
+Позиции упаковываются в массив кодов фигур формы (N, 64) (коды те же, что в Board.squares:
+color << 3 | kind, 0 - пустая клетка) или в плоскости фигур формы (N, 12, 8, 8).
+Оценка - материал, положение фигур (те же таблицы, что в engine.evaluate) и подвижность
+коней и дальнобойных фигур - считается сразу для всего массива и возвращается массивом формы (N,).
+Подвижность считается по битовым доскам uint64 сдвигами, без перебора клеток. Нужен NumPy 2.0 или новее.
+
+Запуск (сравнение с engine.evaluate на случайных позициях):
+    python batch_eval.py --positions 100000
+"""
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from core import *
+from engine import evaluate
+
+MOBILITY_WEIGHT = 2  # Бонус за каждую атакованную клетку
+CHUNK_SIZE = 65536  # Позиций в одном шаге расчёта подвижности (ограничивает объём временных массивов)
+
+# Коды фигур в порядке плоскостей: белые пешка, конь, слон, ладья, ферзь, король, затем чёрные
+PLANE_CODES = np.array([color << 3 | kind for color in (WHITE, BLACK) for kind in range(PAWN, KING + 1)],
+                       dtype=np.uint8)
+
+# Коды фигур по объектам из Board.field
+FIGURE_CODES = {piece: code for code, piece in enumerate(PIECES) if piece is not None}
+
+
+def _build_score_table():
+    """SCORE_TABLE[code, sq] - материал и бонус за положение фигуры с кодом code в клетке sq
+    с точки зрения белых."""
+    table = np.zeros((len(PIECES), 64), dtype=np.int32)
+    for color, sign in ((WHITE, 1), (BLACK, -1)):
+        for kind in range(PAWN, KING + 1):
+            for sq in range(64):
+                table[color << 3 | kind, sq] = sign * (PIECE_VALUES[kind] +
+                                                       PIECE_SQUARE_TABLES[kind][pst_index(color, sq)])
+    return table
+
+
+SCORE_TABLE = _build_score_table()
+SQUARES = np.arange(64)
+
+# Маски вертикалей для сдвигов битовых досок: после сдвига на восток бит не может оказаться
+# на вертикали a, после сдвига на запад - на вертикали h
+NOT_A_FILE = np.uint64(0xfefefefefefefefe)
+NOT_AB_FILE = np.uint64(0xfcfcfcfcfcfcfcfc)
+NOT_H_FILE = np.uint64(0x7f7f7f7f7f7f7f7f)
+NOT_GH_FILE = np.uint64(0x3f3f3f3f3f3f3f3f)
+FULL = np.uint64(0xffffffffffffffff)
+
+# Сдвиги битовой доски: (сдвиг, маска), положительный сдвиг - влево (номер клетки растёт)
+STRAIGHT_SHIFTS = ((8, FULL), (-8, FULL), (1, NOT_A_FILE), (-1, NOT_H_FILE))
+DIAG_SHIFTS = ((9, NOT_A_FILE), (7, NOT_H_FILE), (-7, NOT_A_FILE), (-9, NOT_H_FILE))
+KNIGHT_SHIFTS = ((17, NOT_A_FILE), (15, NOT_H_FILE), (10, NOT_AB_FILE), (6, NOT_GH_FILE),
+                 (-6, NOT_AB_FILE), (-10, NOT_GH_FILE), (-15, NOT_A_FILE), (-17, NOT_H_FILE))
+
+
+def pack_boards(boards):
+    """Массив кодов фигур формы (N, 64) для списка досок."""
+    return np.frombuffer(b''.join(bytes(board.squares) for board in boards), dtype=np.uint8).reshape(-1, 64)
+
+
+def pack_fields(fields):
+    """Массив кодов фигур формы (N, 64) для списка досок в виде Board.field (массивов 8x8 фигур)."""
+    codes = np.zeros((len(fields), 64), dtype=np.uint8)
+    for i, field in enumerate(fields):
+        codes[i] = [FIGURE_CODES.get(piece, 0) if piece is None or piece in FIGURE_CODES
+                    else piece.get_color() << 3 | FIGURE_KINDS[piece.__class__]
+                    for line in field for piece in line]
+    return codes
+
+
+def to_planes(codes):
+    """Плоскости фигур формы (N, 12, 8, 8) из массива кодов формы (N, 64)."""
+    codes = np.asarray(codes)
+    return (codes[:, None, :] == PLANE_CODES[None, :, None]).reshape(len(codes), 12, 8, 8)
+
+
+def from_planes(planes):
+    """Массив кодов формы (N, 64) из плоскостей фигур формы (N, 12, 8, 8)."""
+    planes = np.asarray(planes).reshape(len(planes), 12, 64)
+    return (planes * PLANE_CODES[None, :, None]).sum(axis=1).astype(np.uint8)
+
+
+def bitboards(mask):
+    """Битовые доски (массив uint64 формы (N,)) из логического массива формы (N, 64)."""
+    return np.packbits(mask, axis=1, bitorder='little').view('<u8').reshape(-1)
+
+
+def shift(bitboard, offset):
+    """Сдвиг битовых досок на offset клеток."""
+    if offset > 0:
+        return bitboard << np.uint64(offset)
+    return bitboard >> np.uint64(-offset)
+
+
+def slider_fill(pieces, empty, shifts):
+    """Клетки, атакованные дальнобойными фигурами pieces по направлениям shifts
+    при пустых клетках empty (заполнение Когге-Стоуна)."""
+    result = np.zeros_like(pieces)
+    for offset, mask in shifts:
+        free = empty & mask
+        fill = pieces
+        # Луч растёт по пустым клеткам шагами 1, 2, 4
+        fill = fill | free & shift(fill, offset)
+        free = free & shift(free, offset)
+        fill = fill | free & shift(fill, 2 * offset)
+        free = free & shift(free, 2 * offset)
+        fill = fill | free & shift(fill, 4 * offset)
+        result |= shift(fill, offset) & mask
+    return result
+
+
+def mobility(codes):
+    """Подвижность фигур с точки зрения белых, массив формы (N,): для коней, слонов, ладей и ферзей
+    каждого цвета - число клеток, атакованных хотя бы одной фигурой этого вида (без учёта связок и шахов)."""
+    codes = np.asarray(codes)
+    result = np.zeros(len(codes), dtype=np.int32)
+    for start in range(0, len(codes), CHUNK_SIZE):
+        chunk = codes[start:start + CHUNK_SIZE]
+        empty = bitboards(chunk == 0)
+        for color, sign in ((WHITE, 1), (BLACK, -1)):
+            knights = bitboards(chunk == color << 3 | KNIGHT)
+            attacked = [np.bitwise_or.reduce([shift(knights, offset) & mask for offset, mask in KNIGHT_SHIFTS]),
+                        slider_fill(bitboards(chunk == color << 3 | BISHOP), empty, DIAG_SHIFTS),
+                        slider_fill(bitboards(chunk == color << 3 | ROOK), empty, STRAIGHT_SHIFTS)]
+            queens = bitboards(chunk == color << 3 | QUEEN)
+            attacked.append(slider_fill(queens, empty, STRAIGHT_SHIFTS) | slider_fill(queens, empty, DIAG_SHIFTS))
+            for mask in attacked:
+                result[start:start + CHUNK_SIZE] += sign * np.bitwise_count(mask).astype(np.int32)
+    return result
+
+
+def evaluate_batch(positions, colors=None, with_mobility=True):
+    """Оценка позиций positions - массива кодов (N, 64) или плоскостей (N, 12, 8, 8).
+    Если задан массив colors (цвет игрока, который делает ход, для каждой позиции),
+    оценки даются с его точки зрения, иначе - с точки зрения белых. Возвращает массив формы (N,)."""
+    codes = np.asarray(positions)
+    if codes.ndim == 4:
+        codes = from_planes(codes)
+    codes = codes.astype(np.intp)
+
+    scores = SCORE_TABLE[codes, SQUARES].sum(axis=1)
+    if with_mobility:
+        scores += MOBILITY_WEIGHT * mobility(codes)
+    if colors is not None:
+        scores = np.where(np.asarray(colors) == WHITE, scores, -scores)
+    return scores
+
+
+def evaluate_boards(boards, with_mobility=True):
+    """Оценка списка досок с точки зрения игрока, который делает ход в каждой позиции."""
+    return evaluate_batch(pack_boards(boards), [board.color for board in boards], with_mobility)
+
+
+def random_boards(count, seed=0, max_plies=80):
+    """Случайные позиции: доски после случайного числа случайных ходов от начальной позиции."""
+    generator = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = Board()
+        for _ in range(generator.randrange(max_plies)):
+            moves = board.legal_moves()
+            if not moves:
+                break
+            board.make_move(generator.choice(moves))
+        board.undo_stack = []
+        boards.append(board)
+    return boards
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Пакетная оценка позиций на NumPy")
+    parser.add_argument("--positions", type=int, default=10000, help="число случайных позиций")
+    parser.add_argument("--distinct", type=int, default=500, help="число разных позиций среди них")
+    args = parser.parse_args(args)
+
+    distinct = random_boards(min(args.distinct, args.positions))
+    boards = [distinct[i % len(distinct)] for i in range(args.positions)]
+
+    start = time.perf_counter()
+    expected = np.array([evaluate(board) for board in boards])
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    codes = pack_boards(boards)
+    pack_time = time.perf_counter() - start
+    colors = [board.color for board in boards]
+
+    start = time.perf_counter()
+    scores = evaluate_batch(codes, colors, with_mobility=False)
+    batch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    evaluate_batch(codes, colors)
+    mobility_time = time.perf_counter() - start
+
+    matches = np.array_equal(scores, expected)
+    print(f"Позиций: {len(boards)}")
+    print(f"engine.evaluate: {serial_time:.3f} с, {len(boards) / serial_time:.0f} позиций/с")
+    print(f"упаковка: {pack_time:.3f} с; материал и положение: {batch_time:.3f} с, "
+          f"{len(boards) / batch_time:.0f} позиций/с, совпадение с engine.evaluate: {'да' if matches else 'НЕТ'}")
+    print(f"с подвижностью: {mobility_time:.3f} с, {len(boards) / mobility_time:.0f} позиций/с")
+    return 0 if matches else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,49 @@
+import random
+from collections import namedtuple
+
+# Ход: фигура из клетки (row, col) идёт в клетку (row1, col1).
+# При превращении пешки promotion содержит класс новой фигуры, иначе None.
+Move = namedtuple('Move', ['row', 'col', 'row1', 'col1', 'promotion'], defaults=[None])
+
+
+def move_to_uci(move):
+    """Функция возвращает запись хода в формате UCI, например 'e2e4' или 'e7e8q'."""
+    text = chr(ord('a') + move.col) + str(move.row + 1) + chr(ord('a') + move.col1) + str(move.row1 + 1)
+    if move.promotion:
+        text += PROMOTION_LETTERS[move.promotion]
+    return text
+
+
+def pack_move(move):
+    """Функция упаковывает ход в 15-битное число: клетка начала, клетка конца и номер фигуры превращения."""
+    promotion = PROMOTION_PIECES.index(move.promotion) + 1 if move.promotion else 0
+    return square(move.row, move.col) | square(move.row1, move.col1) << 6 | promotion << 12
+
+
+def unpack_move(code):
+    """Функция восстанавливает ход, упакованный функцией pack_move."""
+    row, col = divmod(code & 63, 8)
+    row1, col1 = divmod(code >> 6 & 63, 8)
+    promotion = code >> 12 & 7
+    return Move(row, col, row1, col1, PROMOTION_PIECES[promotion - 1] if promotion else None)
+
+
+def uci_to_move(text):
+    """Функция преобразует запись хода в формате UCI в объект Move."""
+    text = text.strip().lower()
+    if len(text) not in (4, 5):
+        raise ValueError(f"Некорректная запись хода: '{text}'")
+    col, row, col1, row1 = ord(text[0]) - ord('a'), int(text[1]) - 1, ord(text[2]) - ord('a'), int(text[3]) - 1
+    if not correct_coords(row, col) or not correct_coords(row1, col1):
+        raise ValueError(f"Некорректная запись хода: '{text}'")
+    promotion = None
+    if len(text) == 5:
+        promotion = next((figure for figure, letter in PROMOTION_LETTERS.items() if letter == text[4]), None)
+        if promotion is None:
+            raise ValueError(f"Некорректная фигура превращения: '{text[4]}'")
+    return Move(row, col, row1, col1, promotion)
+
+
 def opponent(color):
     """Возвращает цвет противника."""
     if color == WHITE:
@@ -12,50 +58,106 @@ def correct_coords(row, col):
     return 0 <= row < 8 and 0 <= col < 8
 
 
-def move_direction(row, col, row1, col1):
-    """Функция возвращает кортеж, описывающий направление движения
-    из клетки (row, col) в клетку (row1, col1) по горизонтали и по вертикали.
-    '+' - движение вверх/вправо. '-' - движение вниз/влево. '0' - движения не было."""
-    # Движение по вертикали
-    if row - row1 > 0:
-        i = '-'
-    elif row - row1 < 0:
-        i = '+'
-    else:
-        i = '0'
+def square(row, col):
+    """Функция возвращает номер клетки (row, col) в битовой доске."""
+    return row * 8 + col
 
-    # Движение по горизонтали
-    if col - col1 > 0:
-        j = '-'
-    elif col - col1 < 0:
-        j = '+'
-    else:
-        j = '0'
 
-    return i, j
+def pst_index(color, sq):
+    """Возвращает индекс клетки sq в таблице PIECE_SQUARE_TABLES для фигуры цвета color."""
+    row, col = divmod(sq, 8)
+    return (7 - row) * 8 + col if color == WHITE else sq
+
+
+def slider_attacks(sq, occupancy, directions):
+    """Функция возвращает битовую маску клеток, которые атакует дальнобойная фигура
+    из клетки sq по направлениям directions. Занятые клетки из occupancy останавливают луч."""
+    attacks = 0
+    for direction in directions:
+        ray = RAYS[direction][sq]
+        blockers = ray & occupancy
+        if blockers:
+            # Луч обрывается на ближайшей к клетке sq занятой клетке
+            ray ^= RAYS[direction][first_square(blockers, direction)]
+        attacks |= ray
+    return attacks
+
+
+def attacks(kind, color, sq, occupancy):
+    """Функция возвращает битовую маску клеток, которые атакует фигура вида kind и цвета color
+    из клетки sq при занятых клетках occupancy."""
+    if kind == PAWN:
+        return PAWN_ATTACKS[color][sq]
+    if kind == KNIGHT:
+        return KNIGHT_ATTACKS[sq]
+    if kind == KING:
+        return KING_ATTACKS[sq]
+    if kind == ROOK:
+        return slider_attacks(sq, occupancy, STRAIGHT_DIRECTIONS)
+    if kind == BISHOP:
+        return slider_attacks(sq, occupancy, DIAG_DIRECTIONS)
+    return slider_attacks(sq, occupancy, STRAIGHT_DIRECTIONS + DIAG_DIRECTIONS)
+
+
+def first_square(mask, direction):
+    """Функция возвращает номер ближайшей клетки маски mask при движении в направлении direction."""
+    if direction in POSITIVE_DIRECTIONS:
+        return (mask & -mask).bit_length() - 1
+    return mask.bit_length() - 1
 
 
 class Board:
     def __init__(self):
-        self.color = WHITE
-        self.field = []
-
-        for row in range(8):
-            self.field.append([None] * 8)
+        self.clear()
 
-        figures = [Rook, Knight, Bishop, Queen, King, Bishop, Knight, Rook]  # Порядок фигур
+        kinds = [ROOK, KNIGHT, BISHOP, QUEEN, KING, BISHOP, KNIGHT, ROOK]  # Порядок фигур
 
         for j in range(8):
-            self.field[7][j] = figures[j](BLACK)  # Расставляем фигуры
-            self.field[0][j] = figures[j](WHITE)
-            self.field[6][j] = Pawn(BLACK)  # Расставляем пешки
-            self.field[1][j] = Pawn(WHITE)
+            self.put_code(square(7, j), BLACK << 3 | kinds[j])  # Расставляем фигуры
+            self.put_code(square(0, j), WHITE << 3 | kinds[j])
+            self.put_code(square(6, j), BLACK << 3 | PAWN)  # Расставляем пешки
+            self.put_code(square(1, j), WHITE << 3 | PAWN)
 
-        self.is_check = False  # Атрибут для отслеживания шаха
+        self.castling = CASTLING_ALL
+        self.update_hash()
+
+    def clear(self):
+        """Убрать с доски все фигуры и сбросить состояние партии."""
+        self.color = WHITE
 
-        # Координаты королей
-        self.black_king_coords = 7, 4
-        self.white_king_coords = 0, 4
+        # Позиция хранится в двух видах:
+        # squares - 64 кода фигур (color << 3 | kind, 0 - пустая клетка),
+        # bitboards - битовые маски фигур каждого вида и цвета.
+        # Бит и элемент с номером row * 8 + col отвечают за клетку (row, col).
+        self.squares = bytearray(64)
+        self._field_view = None
+
+        self.bitboards = {WHITE: [0] * 7, BLACK: [0] * 7}  # Индекс списка - вид фигуры
+        self.occupied = {WHITE: 0, BLACK: 0}  # Клетки, занятые фигурами каждого цвета
+        self.occupancy = 0  # Все занятые клетки
+
+        # Права на рокировку: маска из CASTLING_WHITE0, CASTLING_WHITE7, CASTLING_BLACK0, CASTLING_BLACK7
+        self.castling = 0
+
+        # Шахи и связки короля (результат king_safety) и допустимые ходы (результат legal_moves),
+        # сбрасываются при изменении позиции
+        self._king_safety = None
+        self._legal_moves = None
+
+        # 64-битный ключ позиции (хеш Зобриста), обновляется при каждом изменении позиции.
+        # _hashed_castling и _hashed_en_passant - права на рокировку и клетка взятия на проходе,
+        # которые сейчас учтены в ключе.
+        self.hash = 0
+        self._hashed_castling = 0
+        self._hashed_en_passant = None
+
+        # Слагаемые оценки позиции, обновляются при каждой установке и снятии фигуры:
+        # material - материал белых минус материал чёрных, placement - то же для бонусов
+        # за положение фигур (PIECE_SQUARE_TABLES), phase - стадия партии по фигурам на доске
+        # (MAX_PHASE в начале партии, 0 - остались только короли и пешки)
+        self.material = 0
+        self.placement = 0
+        self.phase = 0
 
         # Атрибут для отслеживания возможности взятия на проходе
         self.long_pawn_move = False
@@ -64,11 +166,270 @@ class Board:
         # Если взятие на подходе невозможно, атрибут равен None
         self.en_passant = None
 
-        # Если король находится под атакой,
-        # список содержит кортежи, каждый из которых описывает напрвление от атакующей фигуры до короля
-        self.attack_direction = []
-
-        self.double_attack = False  # Если королю ургожают две фигуры противника, атрибут равет True
+        # Счётчик полуходов без взятий и ходов пешками и номер хода
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+
+        # Стек записей для отмены ходов, сделанных методом make_move
+        self.undo_stack = []
+
+    def copy(self):
+        """Возвращает независимую копию доски (вместе со стеком отмены ходов)."""
+        board = self.__class__.__new__(self.__class__)
+        board.__dict__.update(self.__dict__)
+        board.squares = bytearray(self.squares)
+        board.bitboards = {WHITE: self.bitboards[WHITE][:], BLACK: self.bitboards[BLACK][:]}
+        board.occupied = self.occupied.copy()
+        board.undo_stack = self.undo_stack[:]
+        return board
+
+    @classmethod
+    def from_fen(cls, fen):
+        """Создаёт доску с позицией, записанной в нотации FEN.
+        Права на рокировку учитываются, только если король и ладья стоят на своих местах."""
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"Некорректная запись FEN: '{fen}'")
+        placement, side, castling, en_passant = fields[:4]
+
+        board = cls.__new__(cls)
+        board.clear()
+
+        lines = placement.split('/')
+        if len(lines) != 8:
+            raise ValueError(f"Некорректная расстановка фигур: '{placement}'")
+        for i, line in enumerate(lines):
+            row, col = 7 - i, 0
+            previous = ''
+            for char in line:
+                if char in '12345678':
+                    # Две цифры подряд (например, "44") в FEN не допускаются
+                    if previous.isdigit():
+                        raise ValueError(f"Некорректная расстановка фигур: '{placement}'")
+                    col += int(char)
+                    previous = char
+                    continue
+                previous = char
+                if char not in FEN_CODES or col > 7:
+                    raise ValueError(f"Некорректная расстановка фигур: '{placement}'")
+                board.put_code(square(row, col), FEN_CODES[char])
+                col += 1
+            if col != 8:
+                raise ValueError(f"Некорректная расстановка фигур: '{placement}'")
+
+        for letter, right in FEN_CASTLING.items():
+            king_sq, rook_sq, color = CASTLING_SQUARES[right]
+            if letter in castling and board.squares[king_sq] == color << 3 | KING and \
+                    board.squares[rook_sq] == color << 3 | ROOK:
+                board.castling |= right
+
+        if side not in ('w', 'b'):
+            raise ValueError(f"Некорректная очередь хода: '{side}'")
+        if side == 'b':
+            board.color = BLACK
+            board.hash ^= ZOBRIST_SIDE
+
+        if en_passant != '-':
+            # Клетка взятия на проходе лежит за пешкой соперника, только что сделавшей ход на две клетки:
+            # на 6 горизонтали, если ходят белые, и на 3, если чёрные
+            if len(en_passant) != 2 or en_passant[0] not in 'abcdefgh' or \
+                    en_passant[1] != ('6' if board.color == WHITE else '3'):
+                raise ValueError(f"Некорректная клетка взятия на проходе: '{en_passant}'")
+            row, col = int(en_passant[1]) - 1, ord(en_passant[0]) - ord('a')
+            pawn_row = row - 1 if board.color == WHITE else row + 1
+            if board.squares[square(row, col)] or \
+                    board.squares[square(pawn_row, col)] != opponent(board.color) << 3 | PAWN:
+                raise ValueError(f"Некорректная клетка взятия на проходе: '{en_passant}'")
+            board.en_passant = row, col
+
+        if len(fields) >= 6:
+            if not fields[4].isdigit() or not fields[5].isdigit() or int(fields[5]) < 1:
+                raise ValueError(f"Некорректные счётчики ходов: '{fields[4]} {fields[5]}'")
+            board.halfmove_clock = int(fields[4])
+            board.fullmove_number = int(fields[5])
+
+        board.update_hash()
+        return board
+
+    def to_fen(self):
+        """Возвращает запись позиции в нотации FEN."""
+        lines = []
+        for row in range(7, -1, -1):
+            line = ''
+            empty = 0
+            for code in self.squares[row * 8:row * 8 + 8]:
+                if not code:
+                    empty += 1
+                    continue
+                if empty:
+                    line += str(empty)
+                    empty = 0
+                line += FEN_LETTERS_BY_CODE[code]
+            if empty:
+                line += str(empty)
+            lines.append(line)
+
+        castling = ''.join(letter for letter, right in FEN_CASTLING.items() if self.castling & right) or '-'
+        en_passant = chr(ord('a') + self.en_passant[1]) + str(self.en_passant[0] + 1) if self.en_passant else '-'
+        side = 'w' if self.color == WHITE else 'b'
+        return f"{'/'.join(lines)} {side} {castling} {en_passant} {self.halfmove_clock} {self.fullmove_number}"
+
+    @property
+    def field(self):
+        """Доска в виде массива 8x8 с объектами фигур, только для чтения.
+        Объекты фигур общие для всех досок (PIECES), пустые клетки - None."""
+        if self._field_view is None:
+            self._field_view = tuple(tuple(PIECES[code] for code in self.squares[row * 8:row * 8 + 8])
+                                     for row in range(8))
+        return self._field_view
+
+    @property
+    def white_king_coords(self):
+        """Координаты белого короля или None."""
+        return self.king_coords(WHITE)
+
+    @property
+    def black_king_coords(self):
+        """Координаты чёрного короля или None."""
+        return self.king_coords(BLACK)
+
+    def king_coords(self, color):
+        """Возвращает координаты короля цвета color или None, если короля нет на доске."""
+        king = self.bitboards[color][KING]
+        return divmod(king.bit_length() - 1, 8) if king else None
+
+    def put_code(self, sq, code):
+        """Поставить фигуру с кодом code в пустую клетку sq."""
+        bit = 1 << sq
+        color = code >> 3
+        self.squares[sq] = code
+        self._field_view = None
+        self._king_safety = None
+        self._legal_moves = None
+        self.bitboards[color][code & 7] |= bit
+        self.occupied[color] |= bit
+        self.occupancy |= bit
+        self.hash ^= ZOBRIST_PIECES[color][code & 7][sq]
+        self.material += PIECE_MATERIAL[code]
+        self.placement += PIECE_PLACEMENT[code][sq]
+        self.phase += PIECE_PHASE[code]
+
+    def remove_code(self, sq):
+        """Снять фигуру с клетки sq. Возвращает код снятой фигуры или 0."""
+        code = self.squares[sq]
+        if not code:
+            return 0
+        bit = 1 << sq
+        color = code >> 3
+        self.squares[sq] = 0
+        self._field_view = None
+        self._king_safety = None
+        self._legal_moves = None
+        self.bitboards[color][code & 7] &= ~bit
+        self.occupied[color] &= ~bit
+        self.occupancy &= ~bit
+        self.hash ^= ZOBRIST_PIECES[color][code & 7][sq]
+        self.material -= PIECE_MATERIAL[code]
+        self.placement -= PIECE_PLACEMENT[code][sq]
+        self.phase -= PIECE_PHASE[code]
+        return code
+
+    def put_piece(self, row, col, piece):
+        """Поставить фигуру piece в пустую клетку (row, col)."""
+        self.put_code(square(row, col), piece.get_color() << 3 | FIGURE_KINDS[piece.__class__])
+
+    def remove_piece(self, row, col):
+        """Снять фигуру с клетки (row, col). Возвращает снятую фигуру или None."""
+        return PIECES[self.remove_code(square(row, col))]
+
+    def attackers_to(self, sq, color, occupancy):
+        """Возвращает битовую маску фигур цвета color, атакующих клетку sq,
+        если заняты клетки occupancy."""
+        pieces = self.bitboards[color]
+        # Фигура атакует клетку, если из этой клетки такая же фигура атаковала бы её саму
+        return (KNIGHT_ATTACKS[sq] & pieces[KNIGHT] |
+                KING_ATTACKS[sq] & pieces[KING] |
+                PAWN_ATTACKS[opponent(color)][sq] & pieces[PAWN] |
+                slider_attacks(sq, occupancy, STRAIGHT_DIRECTIONS) & (pieces[ROOK] | pieces[QUEEN]) |
+                slider_attacks(sq, occupancy, DIAG_DIRECTIONS) & (pieces[BISHOP] | pieces[QUEEN]))
+
+    def king_safety(self, color=None):
+        """Возвращает кортеж (checkers, evasions, pins) для короля цвета color (по умолчанию - текущего игрока):
+        checkers - маска фигур противника, которые объявили королю шах;
+        evasions - маска клеток, ход в которые закрывает от шаха или берёт шахующую фигуру
+        (все клетки, если шаха нет, и ни одной при двойном шахе);
+        pins - словарь: клетка связанной фигуры -> маска клеток линии связки, по которой она может ходить.
+        Вычисляется один раз для позиции."""
+        if color is None:
+            color = self.color
+        if self._king_safety is not None and self._king_safety[0] == color:
+            return self._king_safety[1]
+
+        king = self.bitboards[color][KING]
+        if not king:
+            result = 0, ALL_SQUARES, {}
+            self._king_safety = color, result
+            return result
+
+        king_sq = king.bit_length() - 1
+        enemy = self.bitboards[opponent(color)]
+        checkers = self.attackers_to(king_sq, opponent(color), self.occupancy)
+        if not checkers:
+            evasions = ALL_SQUARES
+        elif checkers & (checkers - 1):
+            evasions = 0  # От двойного шаха спасает только ход королём
+        else:
+            evasions = checkers | BETWEEN[king_sq][checkers.bit_length() - 1]
+
+        # Фигура связана, если она единственная между королём и дальнобойной фигурой противника
+        pins = {}
+        own = self.occupied[color]
+        for directions, kind in ((STRAIGHT_DIRECTIONS, ROOK), (DIAG_DIRECTIONS, BISHOP)):
+            pinners = (enemy[kind] | enemy[QUEEN]) & slider_attacks(king_sq, 0, directions)
+            while pinners:
+                bit = pinners & -pinners
+                pinners ^= bit
+                line = BETWEEN[king_sq][bit.bit_length() - 1]
+                blockers = line & self.occupancy
+                if blockers & own and not blockers & (blockers - 1):
+                    pins[blockers.bit_length() - 1] = line | bit
+
+        result = checkers, evasions, pins
+        self._king_safety = color, result
+        return result
+
+    def in_check(self):
+        """Проверяет, объявлен ли шах королю текущего игрока (любой фигурой противника)."""
+        return self.king_safety()[0] != 0
+
+    def has_legal_moves(self):
+        """Проверяет, есть ли у текущего игрока хотя бы один допустимый ход.
+        Если ходы ещё не найдены методом legal_moves, перебор останавливается на первом найденном."""
+        if self._legal_moves is not None:
+            return len(self._legal_moves[0]) > 0
+        return next(self.generate_legal_moves(), None) is not None
+
+    def status(self):
+        """Возвращает состояние текущего игрока: CHECK, MATE, STALEMATE или None.
+        Шах определяется по всем фигурам противника, поэтому учитываются вскрытые шахи
+        и шахи после рокировки или взятия на проходе."""
+        if self.in_check():
+            return CHECK if self.has_legal_moves() else MATE
+        return None if self.has_legal_moves() else STALEMATE
+
+    def update_hash(self):
+        """Учесть в ключе позиции изменившиеся права на рокировку и клетку взятия на проходе."""
+        rights = self.castling
+        if rights != self._hashed_castling:
+            self.hash ^= ZOBRIST_CASTLING[self._hashed_castling] ^ ZOBRIST_CASTLING[rights]
+            self._hashed_castling = rights
+
+        if self.en_passant != self._hashed_en_passant:
+            if self._hashed_en_passant:
+                self.hash ^= ZOBRIST_EN_PASSANT[self._hashed_en_passant[1]]
+            if self.en_passant:
+                self.hash ^= ZOBRIST_EN_PASSANT[self.en_passant[1]]
+            self._hashed_en_passant = self.en_passant
 
     def current_player_color(self):
         return self.color
@@ -84,156 +445,266 @@ class Board:
             # Если пешка не двигалась на 2 клетки, перестаем отслеживать взятие на подходе
             self.en_passant = None
 
-        # Перестаём отслеживать шах
-        self.is_check = False
-        self.attack_direction = []
-        self.double_attack = False
-
         # Передаем ход другому игроку
+        if self.color == BLACK:
+            self.fullmove_number += 1
         self.color = opponent(self.color)
+        self.hash ^= ZOBRIST_SIDE
+        self.update_hash()
+
+    def legal_moves(self):
+        """Возвращает кортеж всех допустимых ходов текущего игрока.
+        Ходы вычисляются один раз для позиции и используются методами try_move, move_options
+        и try_promote_pawn; кеш сбрасывается при любом изменении позиции."""
+        return self._legal_move_cache()[0]
+
+    def legal_move_targets(self):
+        """Возвращает словарь: клетка фигуры текущего игрока -> битовая маска клеток,
+        в которые она может пойти (включая рокировку). Фигуры без ходов в словарь не входят."""
+        return self._legal_move_cache()[1]
+
+    def _legal_move_cache(self):
+        if self._legal_moves is None:
+            moves = tuple(self.generate_legal_moves())
+            targets = {}
+            for move in moves:
+                sq = square(move.row, move.col)
+                targets[sq] = targets.get(sq, 0) | 1 << square(move.row1, move.col1)
+            self._legal_moves = moves, targets
+        return self._legal_moves
 
     def try_move(self, row, col, row1, col1):
         """Метод проверяет, можно ли переместить фигуру из клетки (row, col) в клетку (row1, col1).
-        Если перемещение возможно, вернёт True.
-        Если нет --- вернёт строку, содержащую причину, по которой переместить фигуру нельзя"""
-
-        if row == row1 and col == col1:
-            return False
-
-        piece = self.field[row][col]
-
-        if piece is None:
+        Если перемещение возможно, вернёт True, иначе - False."""
+        if not correct_coords(row, col) or not correct_coords(row1, col1):
             return False
-        if piece.get_color() != self.color:
+        return self.legal_move_targets().get(square(row, col), 0) >> square(row1, col1) & 1 == 1
+
+    def is_legal_move(self, move):
+        """Проверяет, является ли move допустимым ходом текущего игрока.
+        В отличие от try_move, не перебирает все ходы позиции (например, для хода из таблицы транспозиций)."""
+        sq = square(move.row, move.col)
+        code = self.squares[sq]
+        if code >> 3 != self.color:
             return False
-
-        if isinstance(piece, Pawn) and (row1, col1) == self.en_passant:
-            return piece.can_attack(self, row, col, row1, col1)
-
-        if isinstance(piece, King):
-            if row1 == (self.color - 1) * 7:
-                if col1 == 2 and self.try_castling0():
-                    return True
-                if col1 == 6 and self.try_castling7():
-                    return True
-
-            other_king_row, other_king_col = self.get_opponent_king_coords()
-
-            if abs(row1 - other_king_row) == 1 and \
-                    abs(col1 - other_king_col) == 1:
-                return False
-            elif self.under_attack(row1, col1, self.opponent_color(), False):
+        kind = code & 7
+        if kind == PAWN and move.row1 in (0, 7):
+            if move.promotion not in PROMOTION_PIECES:
                 return False
-
-            # Если король пойдёт вдоль линии атаки, он не сможет убраться из под шаха
-            elif move_direction(row, col, row1, col1) in self.attack_direction:
-                return False
-
-            # Нельзя атаковать фигуру своего цвета
-            elif not piece.can_move(self, row, col, row1, col1) \
-                    or self.field[row1][col1] and self.field[row1][col1].get_color() == self.current_player_color():
-                return False
-
-        elif self.field[row1][col1] is None and not piece.can_move(self, row, col, row1, col1):
-            return False
-
-        # Нельзя атаковать фигуру своего цвета
-        elif self.field[row1][col1] and (self.field[row1][col1].get_color() == piece.get_color() or
-                                         not piece.can_attack(self, row, col, row1, col1)):
+        elif move.promotion is not None:
             return False
-
-        # Защитится от шаха можно поставив фигуру в клетку, через которую король может быть атакован
-        # Если королю угрожают сразу две фигуры, защититься от шаха таким образом не получиться
-        elif self.is_check and not self.king_can_be_attacked(row1, col1) or self.double_attack:
-            return False
-
-        # Если фигура закрывает короля от атаки вражеской фигуры,
-        # она может передвигаться только вдоль линии атаки этой фигуры.
-        # В другом случае, передвинувшись она подставит короля под шах.
-        # Конь не может ходить вдоль одной линии,
-        # поэтому вообще не может сдвинуться когда защищает короля
-        elif self.king_can_be_attacked(row, col) and \
-                (move_direction(row, col, row1, col1) != move_direction(*self.get_current_king_coords(), row, col)
-                 and move_direction(row, col, row1, col1) != move_direction(row, col, *self.get_current_king_coords())
-                 or isinstance(piece, Knight)):
-            return False
-
-        return True
+        if kind == KING and abs(move.col1 - move.col) == 2:
+            if move.row1 != move.row:
+                return False
+            return self.try_castling0() if move.col1 == 2 else self.try_castling7()
+        return self.legal_targets(sq) >> square(move.row1, move.col1) & 1 == 1
 
     def move_options(self, row, col):
         """Метод возвращает список клеток,
         в которые может пойти фигура, стоящая в клетке (row, col)."""
         cells = []
-
-        for i in range(8):
-            for j in range(8):
-                if self.try_move(row, col, i, j):
-                    cells.append((i, j))
-
+        targets = self.legal_move_targets().get(square(row, col), 0) if correct_coords(row, col) else 0
+        while targets:
+            target = targets & -targets
+            targets ^= target
+            cells.append(divmod(target.bit_length() - 1, 8))
         return cells
 
+    def generate_legal_moves(self, color=None, origins=None, targets=None):
+        """Генератор всех допустимых ходов игрока цвета color (по умолчанию - текущего игрока).
+        Если задана битовая маска origins, рассматриваются только фигуры, стоящие в этих клетках,
+        если задана маска targets - только ходы в эти клетки (рокировка - по клетке короля).
+        Превращение пешки даёт отдельный ход для каждой фигуры из PROMOTION_PIECES."""
+        if color is None:
+            color = self.color
+        pieces = self.bitboards[color]
+        if origins is None:
+            origins = self.occupied[color]
+        allowed = ALL_SQUARES if targets is None else targets
+        last_row = 7 if color == WHITE else 0
+
+        for kind in range(PAWN, KING + 1):
+            movers = pieces[kind] & origins
+            while movers:
+                bit = movers & -movers
+                movers ^= bit
+                sq = bit.bit_length() - 1
+                row, col = divmod(sq, 8)
+
+                targets = self.legal_targets(sq, color) & allowed
+                while targets:
+                    target = targets & -targets
+                    targets ^= target
+                    row1, col1 = divmod(target.bit_length() - 1, 8)
+                    if kind == PAWN and row1 == last_row:
+                        for figure in PROMOTION_PIECES:
+                            yield Move(row, col, row1, col1, figure)
+                    else:
+                        yield Move(row, col, row1, col1)
+
+        if pieces[KING] & origins and color == self.color:
+            row, col = divmod(pieces[KING].bit_length() - 1, 8)
+            if allowed >> square(row, 2) & 1 and self.try_castling0():
+                yield Move(row, col, row, 2)
+            if allowed >> square(row, 6) & 1 and self.try_castling7():
+                yield Move(row, col, row, 6)
+
+    def legal_targets(self, sq, color=None):
+        """Возвращает битовую маску клеток, в которые фигура цвета color, стоящая в клетке sq,
+        может сделать допустимый ход (без рокировки).
+        Шахи и связки берутся из king_safety, поэтому для обычного хода достаточно наложить маски;
+        отдельно проверяются только ходы короля и взятие на проходе."""
+        code = self.squares[sq]
+        if color is None:
+            color = code >> 3
+        kind = code & 7
+        own = self.occupied[color]
+        en_passant = 0
+
+        if kind == PAWN:
+            row = sq // 8
+            direction = 8 if color == WHITE else -8
+            targets = PAWN_ATTACKS[color][sq] & self.occupied[opponent(color)]
+            # Ход на одну клетку вперёд и на две клетки из начального положения
+            if row != (7 if color == WHITE else 0) and not self.occupancy >> (sq + direction) & 1:
+                targets |= 1 << (sq + direction)
+                if row == (1 if color == WHITE else 6) and not self.occupancy >> (sq + 2 * direction) & 1:
+                    targets |= 1 << (sq + 2 * direction)
+            if self.en_passant and color == self.color and \
+                    PAWN_ATTACKS[color][sq] >> square(*self.en_passant) & 1:
+                en_passant = 1 << square(*self.en_passant)
+        else:
+            targets = attacks(kind, color, sq, self.occupancy) & ~own
+
+        king = self.bitboards[color][KING]
+        if not king:
+            return targets | en_passant
+
+        king_sq = king.bit_length() - 1
+        if kind == KING:
+            # Король не может встать на атакованную клетку
+            legal = 0
+            while targets:
+                target = targets & -targets
+                targets ^= target
+                sq1 = target.bit_length() - 1
+                if self.king_safe_after(color, sq, sq1, sq1, sq1):
+                    legal |= target
+            return legal
+
+        checkers, evasions, pins = self.king_safety(color)
+        targets &= evasions & pins.get(sq, ALL_SQUARES)
+
+        # При взятии на проходе с доски уходят сразу две пешки - проверяем позицию после хода
+        if en_passant:
+            sq1 = en_passant.bit_length() - 1
+            if self.king_safe_after(color, sq, sq1, square(sq // 8, sq1 % 8), king_sq):
+                targets |= en_passant
+        return targets
+
+    def king_safe_after(self, color, sq, sq1, captured, king_sq):
+        """Метод проверяет, останется ли король цвета color, стоящий в клетке king_sq, вне атаки
+        после перемещения фигуры из клетки sq в клетку sq1 со взятием фигуры в клетке captured."""
+        if king_sq is None:
+            return True
+        occupancy = (self.occupancy & ~(1 << sq) & ~(1 << captured)) | 1 << sq1
+        return not self.attackers_to(king_sq, opponent(color), occupancy) & ~(1 << captured)
+
     def move_piece(self, row, col, row1, col1):
         """Переместить фигуру из клетки (row, col) в клетку (row1, col1)."""
-        piece = self.field[row][col]
+        sq, sq1 = square(row, col), square(row1, col1)
+        code = self.squares[sq]
+        kind = code & 7
 
         # Взятие на проходе
-        if isinstance(piece, Pawn):
+        if kind == PAWN:
             if (row1, col1) == self.en_passant:
-                self.field[row][col1] = None
+                self.remove_code(square(row, col1))
             elif abs(row - row1) == 2:
                 direction = 1 if row1 > row else -1
                 self.en_passant = (row + direction, col)
                 self.long_pawn_move = True
 
-        # Отмечаем, что король или ладья передвинулась, для отслеживания рокировки
-        if isinstance(piece, Rook) or isinstance(piece, King):
-            piece.already_moved()
+        # Ход короля или ладьи и взятие ладьи лишают права на рокировку
+        self.castling &= CASTLING_KEEP[sq] & CASTLING_KEEP[sq1]
 
-        # Меняем атрибут для отслеживания координат короля
-        if isinstance(piece, King):
-            if piece.get_color() == WHITE:
-                self.white_king_coords = row1, col1
-            else:
-                self.black_king_coords = row1, col1
-
-            # Рокировка
+        # Рокировка
+        if kind == KING:
             if col1 - col == -2:
                 return self.castling0()
             if col1 - col == 2:
                 return self.castling7()
 
-        self.field[row][col] = None  # Снять фигуру
-        self.field[row1][col1] = piece  # Поставить на новое место.
+        # Счётчик полуходов сбрасывается после хода пешкой или взятия
+        if kind == PAWN or self.squares[sq1]:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+
+        self.remove_code(sq)  # Снять фигуру
+        self.remove_code(sq1)
+        self.put_code(sq1, code)  # Поставить на новое место.
         self.end_turn()
 
     def try_promote_pawn(self, row, col, row1, col1):
         """Метод проверяет, является ли ход из клетки (row, col)
         в клетку (row1, col1) превращением пешки."""
-        if not isinstance(self.field[row][col], Pawn):
+        if not correct_coords(row, col) or self.squares[square(row, col)] & 7 != PAWN:
             return False
 
-        # Проверяем, двигается ли пешка на последний ряд
-        if self.current_player_color() == WHITE and row1 == 7 or self.current_player_color() == BLACK and row1 == 0:
-
-            # Пешка либо движется по прямой, либо атакует по диагонали
-            can_make_turn = self.field[row][col].can_move(self, row, col, row1, col1) and \
-                            self.field[row1][col1] is None or \
-                            self.field[row][col].can_attack(self, row, col, row1, col1) and \
-                            self.field[row1][col1] and self.field[row1][col1].get_color() == self.opponent_color()
-            if can_make_turn:
-                return True
-        return False
+        # Превращение - это допустимый ход пешки на последний ряд
+        return row1 == (7 if self.color == WHITE else 0) and self.try_move(row, col, row1, col1)
 
     def move_and_promote_pawn(self, row, col, row1, col1, figure):
         """Метод перемещает фигуру из клетки (row, col) в клетку (row1, col1),
         после этого превращает её в фигуру figure."""
+        sq1 = square(row1, col1)
 
         # Создаём фигуру того же цвета, что и пешка
-        self.field[row1][col1] = figure(self.field[row][col].get_color())
-        self.field[row][col] = None  # Убираем исходную фигуру
+        pawn = self.remove_code(square(row, col))  # Убираем исходную фигуру
+        self.remove_code(sq1)
+        self.put_code(sq1, pawn & ~7 | FIGURE_KINDS[figure])
+        self.castling &= CASTLING_KEEP[sq1]
 
+        self.halfmove_clock = 0
         self.end_turn()
 
+    def make_move(self, move):
+        """Сделать ход move (объект Move) с возможностью отменить его методом unmake_move."""
+        row, col, row1, col1, promotion = move
+        code = self.squares[square(row, col)]
+
+        # Фигура, которая будет взята, и клетка, в которой она стоит
+        captured_row = row if code & 7 == PAWN and (row1, col1) == self.en_passant else row1
+        captured = self.squares[square(captured_row, col1)]
+
+        self.undo_stack.append((move, code, captured, captured_row, self.castling,
+                                self.en_passant, self.long_pawn_move, self.halfmove_clock, self.fullmove_number))
+
+        if promotion:
+            self.move_and_promote_pawn(row, col, row1, col1, promotion)
+        else:
+            self.move_piece(row, col, row1, col1)
+
+    def unmake_move(self):
+        """Отменить последний ход, сделанный методом make_move."""
+        (move, code, captured, captured_row, self.castling,
+         self.en_passant, self.long_pawn_move, self.halfmove_clock, self.fullmove_number) = self.undo_stack.pop()
+        row, col, row1, col1, promotion = move
+        self.color = opponent(self.color)
+        self.hash ^= ZOBRIST_SIDE
+
+        # Возвращаем на место ладью, участвовавшую в рокировке
+        if code & 7 == KING and abs(col1 - col) == 2:
+            rook_col, rook_col1 = (0, 3) if col1 < col else (7, 5)
+            self.put_code(square(row, rook_col), self.remove_code(square(row, rook_col1)))
+
+        self.remove_code(square(row1, col1))
+        self.put_code(square(row, col), code)
+        if captured:
+            self.put_code(square(captured_row, col1), captured)
+        self.update_hash()
+
     def try_castling0(self):
         """Метод проверяет, может ли текущий игрок совершить длинную рокировку."""
 
@@ -242,19 +713,16 @@ class Board:
         else:
             row = 7
 
-        if self.field[row][1:4] != [None, None, None]:  # Между ладьёй и королём не должны стоять другие фигуры
+        if self.occupancy >> square(row, 1) & 0b111:  # Между ладьёй и королём не должны стоять другие фигуры
             return False
 
-        if not (isinstance(self.field[row][0], Rook) and  # Проверяем, что король и ладья стоят на своих местах
-                isinstance(self.field[row][4], King)):
+        # Король и ладья не должны двигаться до рокировки
+        if not self.castling & (CASTLING_WHITE0 if self.color == WHITE else CASTLING_BLACK0):
             return False
 
-        if self.field[row][0].move_status() or \
-                self.field[row][4].move_status():  # Король и ладья не должны двигаться до рокировки
-            return False
-
-        # Король и поле в которое он передвинется не должны находится под атакой
+        # Король, поле через которое он пройдёт и поле в которое он передвинется не должны находится под атакой
         if self.under_attack(row, 4, self.opponent_color(), False) or \
+                self.under_attack(row, 3, self.opponent_color(), False) or \
                 self.under_attack(row, 2, self.opponent_color(), False):
             return False
 
@@ -267,23 +735,14 @@ class Board:
         else:
             row = 7
 
-        # Отмечаем, что король иладья уже совершили рокировку
-        self.field[row][4].already_moved()
-        self.field[row][0].already_moved()
+        # Отмечаем, что король и ладья уже совершили рокировку
+        self.castling &= CASTLING_KEEP[square(row, 4)]
 
         # Двигаем фигуры
-        self.field[row][2] = self.field[row][4]
-        self.field[row][3] = self.field[row][0]
-
-        self.field[row][4] = None
-        self.field[row][0] = None
-
-        # Меняем атрибут для отслеживания короля
-        if self.current_player_color() == WHITE:
-            self.white_king_coords = row, 2
-        else:
-            self.black_king_coords = row, 2
+        self.put_code(square(row, 2), self.remove_code(square(row, 4)))
+        self.put_code(square(row, 3), self.remove_code(square(row, 0)))
 
+        self.halfmove_clock += 1
         self.end_turn()
 
     def try_castling7(self):
@@ -293,15 +752,12 @@ class Board:
         else:
             row = 7
 
-        if self.field[row][5:7] != [None, None]:
+        if self.occupancy >> square(row, 5) & 0b11:
             return False
-        if not (isinstance(self.field[row][7], Rook) and
-                isinstance(self.field[row][4], King)):
-            return False
-        if self.field[row][7].move_status() or \
-                self.field[row][4].move_status():
+        if not self.castling & (CASTLING_WHITE7 if self.color == WHITE else CASTLING_BLACK7):
             return False
         if self.under_attack(row, 4, self.opponent_color(), False) or \
+                self.under_attack(row, 5, self.opponent_color(), False) or \
                 self.under_attack(row, 6, self.opponent_color(), False):
             return False
 
@@ -314,202 +770,26 @@ class Board:
         else:
             row = 7
 
-        self.field[row][4].already_moved()
-        self.field[row][7].already_moved()
-        self.field[row][6] = self.field[row][4]
-        self.field[row][5] = self.field[row][7]
-        self.field[row][4] = None
-        self.field[row][7] = None
-        if self.current_player_color() == WHITE:
-            self.white_king_coords = row, 6
-        else:
-            self.black_king_coords = row, 6
+        self.castling &= CASTLING_KEEP[square(row, 4)]
+        self.put_code(square(row, 6), self.remove_code(square(row, 4)))
+        self.put_code(square(row, 5), self.remove_code(square(row, 7)))
+        self.halfmove_clock += 1
         self.end_turn()
 
     def under_attack(self, row, col, color, ignore_figure):
         """Метод проверяет находится ли клетка (row, col) под атакой фигуры цвета color.
         Если ignore_figure содержит кортеж из инексов шахматной клетки, фигура,
         стоящая в этой клетке игнорируется."""
-        for i in range(8):
-            for j in range(8):
-                if (i, j) == ignore_figure:
-                    continue
-                if self.field[i][j]:
-                    piece = self.field[i][j]
-                    if (i != row or j != col) and piece.get_color() == color and \
-                            piece.can_attack(self, i, j, row, col):
-                        return True
-        return False
-
-    def can_be_occupied(self, row, col, color, ignore_figure):
-        """Метод проверяет может ли клетка (row, col) быть знаята фигурой цвета color.
-        Если ignore_figure содержит кортеж из инексов шахматной клетки, фигура,
-        стоящая в этой клетке игнорируется."""
-        for i in range(8):
-            for j in range(8):
-                if (i, j) == ignore_figure:
-                    continue
-                if self.field[i][j]:
-                    piece = self.field[i][j]
-                    if (i != row or j != col) and piece.get_color() == color and \
-                            piece.can_move(self, i, j, row, col):
-                        return True
-        return False
-
-    def get_current_king_coords(self):
-        """Возвращает кортеж с координатами короля текущего игрока."""
-        if self.current_player_color() == WHITE:
-            return self.white_king_coords[0], self.white_king_coords[1]
-        else:
-            return self.black_king_coords[0], self.black_king_coords[1]
-
-    def get_opponent_king_coords(self):
-        """Возвращает кортеж с координатами короля противника текущего игрока."""
-        if opponent(self.current_player_color()) == WHITE:
-            return self.white_king_coords[0], self.white_king_coords[1]
-        else:
-            return self.black_king_coords[0], self.black_king_coords[1]
-
-    def king_escapes_attack(self):
-        """Метод проверяет, может ли король текущего игрока уйти
-        из под боя фигуры противника."""
-        row_king, col_king = self.get_current_king_coords()
-
-        # Перебераем соседние клетки.
-        # Король может передвинуться в клетку если она не находится под атакой противника,
-        # не занята фигурой того же цвета что и король и не находится на линнии атаки фигуры противника.
-        free_squares = (any((not (self.under_attack(row_king + i, col_king + j, self.opponent_color(), False) or
-                                  (self.field[row_king + i][col_king + j] is not None and
-                                   self.field[row_king + i][col_king + j].get_color() == self.current_player_color()) or
-                                  move_direction(row_king, col_king, row_king + i,
-                                                 col_king - j) in self.attack_direction))
-                            for j in range(-1, 2)
-                            if (i != 0 or j != 0) and correct_coords(row_king + i, col_king + j))
-                        for i in range(-1, 2))
-        if any(free_squares):
-            return True
-        else:
-            return False
-
-    def check_and_mate(self, row, col):
-        """Метод проверяет может ли фигура в клетке (row, col) поставить шах или мат
-        королю текущего игрока и возвращает CHECK или MATE соответственно.
-        Если шах или мат поставить невозможно, возвращает None."""
-        row_king, col_king = self.get_current_king_coords()
-
-        # Если фигура противника может атаковать короля, она ставит ему шах
-        if self.field[row][col].can_attack(self, row, col, row_king, col_king):
-            self.is_check = True
-
-            step_i = 0
-            step_j = 0
-
-            if row > row_king:
-                step_i = -1
-            elif row < row_king:
-                step_i = 1
-
-            if col > col_king:
-                step_j = -1
-            elif col < col_king:
-                step_j = 1
-
-            # Формируем список клеток, через которые фигура противника ставит королю шах
-            if row == row_king:
-                way_to_king = [(row, j) for j in range(col + step_j, col_king, step_j)]
-            elif col == col_king:
-                way_to_king = [(i, col) for i in range(row + step_i, row_king, step_i)]
-            else:
-                way_to_king = [i for i in zip(range(row + step_i, row_king, step_i),
-                                              range(col + step_j, col_king, step_j))]
-
-            # Если шах ставит не конь, запоминаем направление атаки
-            if not isinstance(self.field[row][col], Knight):
-                self.attack_direction.append(move_direction(row, col, row_king, col_king))
-
-            # Король находится под атакой ещё одной фигуры
-            if self.under_attack(row_king, col_king, self.opponent_color(), (row, col)):
-                self.double_attack = True
-
-            # Защитить короля от шаха можно атаковав фигуру, которая поставила королю шах, или закрыв ей путь к королю
-            # Если короля атакуют сразу две фигуры противника, защитить короля не возможно
-            defend_king = not self.double_attack and \
-                          (self.under_attack(row, col, self.current_player_color(), self.get_current_king_coords()) or
-                           any(self.can_be_occupied(*i, self.current_player_color(), self.get_current_king_coords())
-                               for i in way_to_king))
-
-            # Если игрок может передвинуть короля или защитить короля, ему поставили шах, иначе - мат
-            if self.king_escapes_attack() or defend_king:
-                return CHECK
-            else:
-                return MATE
-        else:
-            return None
-
-    def king_can_be_attacked(self, row, col):
-        """Если король текущего игрока быть атакован через клетку (row, col),
-        метод возвращает координаты фигуры, которая может это сделать.
-        Иначе, метод возвращает False."""
-        row_king, col_king = self.get_current_king_coords()
-
-        # Непосредственно в клетке стоит фигура, угрожающая королю
-        if self.field[row][col] and self.field[row][col].get_color() == self.opponent_color() and \
-                self.field[row][col].can_attack(self, row, col, row_king, col_king):
-            return row, col
-
-        # Через клетку нельзя атаковать короля
-        if not Queen(None).can_move(self, row, col, row_king, col_king):
-            return False
-
-        # Через клетку можно атаковать короля по диагонали
-        if abs(col - col_king) == abs(row - row_king):
-            step_row = -1 if row < row_king else 1
-            step_col = -1 if col < col_king else 1
-
-            # Идём по диагонали в противоположную от короля сторону, пока не встертим другую фигуру
-            while 0 < row < 7 and 0 < col < 7:
-                row += step_row
-                col += step_col
-                if self.field[row][col]:
-                    # Встреченная фигура принадлежит противнику и она может атаковать по диагонали
-                    if self.field[row][col].attack_diag_line() and self.field[row][col].get_color() == \
-                            self.opponent_color():
-                        return row, col
-                    else:
-                        return False
-
-        # Через клетку можно атаковать короля по горизонтали
-        elif row == row_king:
-            start = col + 1 if col > col_king else col - 1
-            end = 8 if col > col_king else -1
-            step = 1 if col > col_king else -1
-
-            for j in range(start, end, step):
-                if self.field[row][j]:
-                    if self.field[row][j].attack_straight_line() and self.field[row][j].get_color() == \
-                            self.opponent_color():
-                        return row, j
-                    else:
-                        return False
-
-        # Через клетку можно атаковать короля по вертикали
-        else:
-            start = row + 1 if row > row_king else row - 1
-            end = 8 if row > row_king else -1
-            step = 1 if row > row_king else -1
-
-            for i in range(start, end, step):
-                if self.field[i][col]:
-                    if self.field[i][col].attack_straight_line() and self.field[i][col].get_color() == \
-                            self.opponent_color():
-                        return i, col
-                    else:
-                        return False
-
-        return False
+        attackers = self.attackers_to(square(row, col), color, self.occupancy)
+        if ignore_figure:
+            attackers &= ~(1 << square(*ignore_figure))
+        return attackers != 0
 
 
 class Figure:
+    """Фигура - вид и цвет. Доска хранит коды фигур, а объекты из PIECES общие для всех досок."""
+    __slots__ = ('color',)
+
     def __init__(self, color):
         self.color = color
 
@@ -528,74 +808,32 @@ class Figure:
     def straight_move(self, board, row, col, row1, col1):
         """Метод проверяет, можно ли движением по вертикали или горизонтали
         добраться из клетки (row, col) в клетку (row1, col1)."""
-        step = 1 if (row1 >= row) else -1
-        for i in range(row + step, row1, step):
-            # Если на пути по горизонтали есть фигура
-            if board.field[i][col]:
-                return False
-
-        step = 1 if (col1 >= col) else -1
-        for j in range(col + step, col1, step):
-            # Если на пути по вертикали есть фигура
-            if board.field[row][j]:
-                return False
-        return True
+        # Между клетками не должно быть других фигур
+        return not BETWEEN[square(row, col)][square(row1, col1)] & board.occupancy
 
     def diag_move(self, board, row, col, row1, col1):
         """Метод проверяет, можно ли движением по диагонали
         добраться из клетки (row, col) в клетку (row1, col1)."""
-        if abs(col - col1) == abs(row - row1):
-            if col1 > col:
-                step = 1 if row1 > row else -1
-                start_row = row
-            else:
-                step = 1 if row1 < row else -1
-                start_row = row1
-
-            param = 0
-            for i in range(min(col, col1) + 1, max(col, col1)):
-                param += step
-                if board.field[start_row + param][i] is not None:
-                    return False
-        return True
-
-    def attack_straight_line(self):
-        """Метод возвращает True если фигура может двигаться на любое кол-во клеток
-         по горизонтали или вертикали."""
-        return False
-
-    def attack_diag_line(self):
-        """Метод возвращает True если фигура может двигаться на любое кол-во клеток
-        по диагонали."""
-        return False
+        return not BETWEEN[square(row, col)][square(row1, col1)] & board.occupancy
 
 
 class Rook(Figure):
-    def __init__(self, color):
-        super().__init__(color)
-        self.moved = False  # Атрибут для отслеживания возможности рокировки
+    __slots__ = ()
 
     def can_move(self, board, row, col, row1, col1):
         # Невозможно сделать ход в клетку, которая не лежит в том же ряду
         # или столбце клеток.
-        if row != row1 and col != col1:
+        if DIRECTIONS_BETWEEN[square(row, col)][square(row1, col1)] not in STRAIGHT_DIRECTIONS:
             return False
         return self.straight_move(board, row, col, row1, col1)
 
     def can_attack(self, board, row, col, row1, col1):
         return self.can_move(board, row, col, row1, col1)
 
-    def already_moved(self):
-        self.moved = True
-
-    def attack_straight_line(self):
-        return True
-
-    def move_status(self):
-        return self.moved
-
 
 class Pawn(Figure):
+    __slots__ = ()
+
     def can_move(self, board, row, col, row1, col1):
         if col != col1:
             return False
@@ -616,79 +854,319 @@ class Pawn(Figure):
         # ход на 2 клетки из начального положения
         if (row == start_row
                 and row + 2 * direction == row1
-                and board.field[row + direction][col] is None):
+                and not board.occupancy >> square(row + direction, col) & 1):
             return True
 
         return False
 
     def can_attack(self, board, row, col, row1, col1):
-        direction = 1 if (self.color == WHITE) else -1
-        return (row + direction == row1
-                and (col + 1 == col1 or col - 1 == col1))
+        return PAWN_ATTACKS[self.color][square(row, col)] >> square(row1, col1) & 1 == 1
 
 
 class Knight(Figure):
+    __slots__ = ()
+
     def can_move(self, board, row, col, row1, col1):
-        return {2, 1} == {abs(row - row1), abs(col - col1)}
+        return KNIGHT_ATTACKS[square(row, col)] >> square(row1, col1) & 1 == 1
 
     def can_attack(self, board, row, col, row1, col1):
         return self.can_move(board, row, col, row1, col1)
 
 
 class King(Figure):
-    def __init__(self, color):
-        super().__init__(color)
-        self.moved = False  # Атрибут для отслеживания возможности рокировки
+    __slots__ = ()
 
     def can_move(self, board, row, col, row1, col1):
-        return {0, 1} == {abs(row - row1), abs(col - col1)} \
-               or {1, 1} == {abs(row - row1), abs(col - col1)}
+        return KING_ATTACKS[square(row, col)] >> square(row1, col1) & 1 == 1
 
     def can_attack(self, board, row, col, row1, col1):
         return self.can_move(board, row, col, row1, col1)
 
-    def already_moved(self):
-        self.moved = True
-
-    def move_status(self):
-        return self.moved
-
 
 class Queen(Figure):
+    __slots__ = ()
+
     def can_move(self, board, row, col, row1, col1):
-        if abs(col - col1) == abs(row - row1):
-            return self.diag_move(board, row, col, row1, col1)
-        elif row == row1 or col == col1:
-            return self.straight_move(board, row, col, row1, col1)
-        return False
+        if DIRECTIONS_BETWEEN[square(row, col)][square(row1, col1)] is None:
+            return False
+        return not BETWEEN[square(row, col)][square(row1, col1)] & board.occupancy
 
     def can_attack(self, board, row, col, row1, col1):
         return self.can_move(board, row, col, row1, col1)
 
-    def attack_straight_line(self):
-        return True
-
-    def attack_diag_line(self):
-        return True
-
 
 class Bishop(Figure):
+    __slots__ = ()
+
     def can_move(self, board, row, col, row1, col1):
-        if abs(col - col1) == abs(row - row1):
-            return self.diag_move(board, row, col, row1, col1)
-        return False
+        if DIRECTIONS_BETWEEN[square(row, col)][square(row1, col1)] not in DIAG_DIRECTIONS:
+            return False
+        return self.diag_move(board, row, col, row1, col1)
 
     def can_attack(self, board, row, col, row1, col1):
         return self.can_move(board, row, col, row1, col1)
 
-    def attack_diag_line(self):
-        return True
-
 
 # Константы цветов
 WHITE = 1
 BLACK = 2
 
-# Константы шаха и мата
+# Константы шаха, мата и пата
 CHECK = 0
-MATE = 1
\ No newline at end of file
+MATE = 1
+STALEMATE = 2
+
+# Виды фигур, индексы в списках битовых досок
+PAWN = 1
+KNIGHT = 2
+BISHOP = 3
+ROOK = 4
+QUEEN = 5
+KING = 6
+
+FIGURE_KINDS = {
+    Pawn: PAWN,
+    Knight: KNIGHT,
+    Bishop: BISHOP,
+    Rook: ROOK,
+    Queen: QUEEN,
+    King: KING
+}
+
+# Фигуры, в которые может превратиться пешка
+PROMOTION_PIECES = (Queen, Rook, Bishop, Knight)
+PROMOTION_LETTERS = {Queen: 'q', Rook: 'r', Bishop: 'b', Knight: 'n'}
+
+
+def _build_pieces():
+    """Создаёт по одному объекту каждой фигуры каждого цвета."""
+    pieces = [None] * (BLACK << 3 | KING + 1)
+    for figure, kind in FIGURE_KINDS.items():
+        for color in (WHITE, BLACK):
+            pieces[color << 3 | kind] = figure(color)
+    return pieces
+
+
+# Общие объекты фигур: PIECES[color << 3 | kind] - фигура вида kind и цвета color, PIECES[0] - None
+PIECES = _build_pieces()
+
+# Буквы фигур в нотации FEN (строчные - для чёрных, заглавные - для белых)
+FEN_LETTERS = {Pawn: 'p', Knight: 'n', Bishop: 'b', Rook: 'r', Queen: 'q', King: 'k'}
+FEN_FIGURES = {(letter.upper() if color == WHITE else letter): (figure, color)  # Буква FEN -> (фигура, цвет)
+               for figure, letter in FEN_LETTERS.items() for color in (WHITE, BLACK)}
+
+# Код фигуры по букве FEN и буква FEN по коду фигуры
+FEN_CODES = {letter: color << 3 | FIGURE_KINDS[figure] for letter, (figure, color) in FEN_FIGURES.items()}
+FEN_LETTERS_BY_CODE = {code: letter for letter, code in FEN_CODES.items()}
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+ALL_SQUARES = (1 << 64) - 1  # Маска всех клеток доски
+
+# Направления движения дальнобойных фигур
+STRAIGHT_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+DIAG_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+def _leaper_attacks(offsets):
+    """Строит маски атак фигуры, прыгающей на смещения offsets, для каждой клетки."""
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        mask = 0
+        for di, dj in offsets:
+            if correct_coords(row + di, col + dj):
+                mask |= 1 << square(row + di, col + dj)
+        table.append(mask)
+    return table
+
+
+# Маски атак коня, короля и пешек каждого цвета для каждой клетки
+KNIGHT_ATTACKS = _leaper_attacks(((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)))
+KING_ATTACKS = _leaper_attacks(STRAIGHT_DIRECTIONS + DIAG_DIRECTIONS)
+PAWN_ATTACKS = {
+    WHITE: _leaper_attacks(((1, -1), (1, 1))),
+    BLACK: _leaper_attacks(((-1, -1), (-1, 1)))
+}
+
+# Направления, в которых номер клетки возрастает
+POSITIVE_DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+
+def _build_rays():
+    """Строит таблицы лучей и клеток между парами клеток."""
+    rays = {}
+    directions = [[None] * 64 for _ in range(64)]
+    between = [[0] * 64 for _ in range(64)]
+
+    for di, dj in STRAIGHT_DIRECTIONS + DIAG_DIRECTIONS:
+        rays[di, dj] = []
+        for sq in range(64):
+            row, col = divmod(sq, 8)
+            ray = 0
+            path = 0  # Клетки, пройденные до текущей клетки луча
+            i, j = row + di, col + dj
+            while correct_coords(i, j):
+                directions[sq][square(i, j)] = di, dj
+                between[sq][square(i, j)] = path
+                path |= 1 << square(i, j)
+                ray |= 1 << square(i, j)
+                i += di
+                j += dj
+            rays[di, dj].append(ray)
+    return rays, directions, between
+
+
+# RAYS[direction][sq] - маска луча из клетки sq в направлении direction (без самой клетки)
+# DIRECTIONS_BETWEEN[sq][sq1] - направление из клетки sq в клетку sq1 или None, если они не на одной линии
+# BETWEEN[sq][sq1] - маска клеток, лежащих строго между клетками sq и sq1 на одной линии
+RAYS, DIRECTIONS_BETWEEN, BETWEEN = _build_rays()
+
+
+# Биты прав на рокировку: 0 - длинная, 7 - короткая
+CASTLING_WHITE0 = 1
+CASTLING_WHITE7 = 2
+CASTLING_BLACK0 = 4
+CASTLING_BLACK7 = 8
+CASTLING_ALL = 15
+
+# Клетки короля и ладьи и цвет для каждого права на рокировку
+CASTLING_SQUARES = {
+    CASTLING_WHITE0: (4, 0, WHITE),
+    CASTLING_WHITE7: (4, 7, WHITE),
+    CASTLING_BLACK0: (60, 56, BLACK),
+    CASTLING_BLACK7: (60, 63, BLACK)
+}
+
+# Права на рокировку в порядке записи FEN
+FEN_CASTLING = {'K': CASTLING_WHITE7, 'Q': CASTLING_WHITE0, 'k': CASTLING_BLACK7, 'q': CASTLING_BLACK0}
+
+
+def _build_castling_keep():
+    """Строит маски прав на рокировку, которые не теряются при ходе из клетки или в неё."""
+    keep = [CASTLING_ALL] * 64
+    for right, (king_sq, rook_sq, color) in CASTLING_SQUARES.items():
+        keep[king_sq] &= ~right
+        keep[rook_sq] &= ~right
+    return keep
+
+
+# CASTLING_KEEP[sq] - права, которые сохраняются после хода из клетки sq или в неё
+CASTLING_KEEP = _build_castling_keep()
+
+
+def _build_zobrist_keys():
+    """Строит случайные 64-битные ключи для хеширования позиций."""
+    generator = random.Random(20210617)  # Фиксированное зерно: ключи одинаковы при каждом запуске
+    pieces = {color: [[generator.getrandbits(64) for _ in range(64)] for _ in range(KING + 1)]
+              for color in (WHITE, BLACK)}
+    side = generator.getrandbits(64)
+
+    # Ключ набора прав на рокировку - XOR ключей каждого права
+    rights = [generator.getrandbits(64) for _ in range(4)]
+    castling = []
+    for mask in range(16):
+        key = 0
+        for i in range(4):
+            if mask >> i & 1:
+                key ^= rights[i]
+        castling.append(key)
+
+    en_passant = [generator.getrandbits(64) for _ in range(8)]
+    return pieces, side, castling, en_passant
+
+
+# ZOBRIST_PIECES[color][kind][sq] - ключ фигуры в клетке, ZOBRIST_SIDE - ключ хода чёрных,
+# ZOBRIST_CASTLING[rights] - ключ прав на рокировку, ZOBRIST_EN_PASSANT[col] - ключ вертикали взятия на проходе
+ZOBRIST_PIECES, ZOBRIST_SIDE, ZOBRIST_CASTLING, ZOBRIST_EN_PASSANT = _build_zobrist_keys()
+
+# Стоимость фигур в сотых долях пешки
+PIECE_VALUES = [0, 100, 320, 330, 500, 900, 0]
+
+# Таблицы бонусов за положение фигур с точки зрения белых.
+# Первая строка таблицы - восьмой ряд доски, последняя - первый.
+PIECE_SQUARE_TABLES = {
+    PAWN: (
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0
+    ),
+    KNIGHT: (
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50
+    ),
+    BISHOP: (
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20
+    ),
+    ROOK: (
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0
+    ),
+    QUEEN: (
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20
+    ),
+    KING: (
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20
+    )
+}
+
+# Вклад фигуры каждого вида в стадию партии и стадия начальной позиции
+PHASE_WEIGHTS = [0, 0, 1, 1, 2, 4, 0]
+MAX_PHASE = 24
+
+
+def _build_piece_scores():
+    """Строит таблицы слагаемых оценки по кодам фигур (с точки зрения белых)."""
+    material = [0] * len(PIECES)
+    placement = [[0] * 64 for _ in PIECES]
+    phase = [0] * len(PIECES)
+    for color, sign in ((WHITE, 1), (BLACK, -1)):
+        for kind in range(PAWN, KING + 1):
+            code = color << 3 | kind
+            material[code] = sign * PIECE_VALUES[kind]
+            placement[code] = [sign * PIECE_SQUARE_TABLES[kind][pst_index(color, sq)] for sq in range(64)]
+            phase[code] = PHASE_WEIGHTS[kind]
+    return material, placement, phase
+
+
+# PIECE_MATERIAL[code] - стоимость фигуры с кодом code, PIECE_PLACEMENT[code][sq] - её бонус за положение
+# в клетке sq (обе со знаком: плюс для белых, минус для чёрных), PIECE_PHASE[code] - её вклад в стадию партии
+PIECE_MATERIAL, PIECE_PLACEMENT, PIECE_PHASE = _build_piece_scores()
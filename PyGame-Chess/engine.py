@@ -0,0 +1,294 @@
+"""Поиск лучшего хода для core.Board.
+
+Алгоритм - negamax с альфа-бета отсечением, итеративным углублением
+и форсированным вариантом (перебор взятий) на листьях.
+Поиск ограничивается глубиной, временем и/или числом узлов.
+
+Запуск:
+    python engine.py --time 5
+    python engine.py --moves e2e4 e7e5 --depth 4 --hash 64
+    python engine.py --fen "<FEN>" --nodes 100000
+"""
+import argparse
+import sys
+import time
+from collections import namedtuple
+
+from book import OpeningBook
+from core import *
+from ordering import MoveOrdering
+from tablebase import DRAW, Tablebases
+from transposition import EXACT, LOWER, UPPER, TranspositionTable
+
+MATE_SCORE = 100000  # Оценка мата; мат в n полуходов оценивается как MATE_SCORE - n
+INFINITY = 1000000
+MAX_DEPTH = 64
+
+CHECK_LIMITS_EVERY = 256  # Как часто (в узлах) проверять оставшееся время
+
+# Результат поиска: лучший ход, оценка с точки зрения текущего игрока, глубина последней
+# завершённой итерации, главный вариант, число узлов и затраченное время в секундах
+SearchResult = namedtuple('SearchResult', ['move', 'score', 'depth', 'pv', 'nodes', 'time'])
+
+
+class SearchStopped(Exception):
+    """Поиск прерван: закончилось время или лимит узлов."""
+
+
+def evaluate(board):
+    """Статическая оценка позиции с точки зрения игрока, который делает ход:
+    материал и положение фигур. Суммы ведёт сама доска (Board.material и Board.placement),
+    поэтому оценка не зависит от числа фигур."""
+    score = board.material + board.placement
+    return score if board.color == WHITE else -score
+
+
+def score_to_tt(score, ply):
+    """Оценка мата сохраняется в таблице как расстояние до мата от текущей позиции, а не от корня."""
+    if score >= MATE_SCORE - MAX_DEPTH:
+        return score + ply
+    if score <= -MATE_SCORE + MAX_DEPTH:
+        return score - ply
+    return score
+
+
+def score_from_tt(score, ply):
+    """Обратное преобразование к score_to_tt."""
+    if score >= MATE_SCORE - MAX_DEPTH:
+        return score - ply
+    if score <= -MATE_SCORE + MAX_DEPTH:
+        return score + ply
+    return score
+
+
+def in_check(board):
+    """Проверяет, атакован ли король игрока, который делает ход."""
+    return board.in_check()
+
+
+class Engine:
+    """Движок: ищет лучший ход в позиции core.Board.
+    Если передана таблица транспозиций tt, результаты поиска сохраняются в ней между вызовами.
+    Если передана дебютная книга book (book.OpeningBook), ход из книги делается без поиска.
+    Если переданы таблицы эндшпилей tablebases (tablebase.Tablebases), позиции из них не ищутся."""
+
+    def __init__(self, tt=None, book=None, tablebases=None):
+        self.tt = tt
+        self.book = book
+        self.tablebases = tablebases
+        self.ordering = MoveOrdering()
+        self.nodes = 0
+        self.deadline = None
+        self.node_limit = None
+        self.can_stop = False  # Поиск не прерывается, пока не завершена первая итерация
+
+    def search(self, board, max_depth=MAX_DEPTH, time_limit=None, node_limit=None, callback=None):
+        """Ищет лучший ход для текущего игрока итеративным углублением.
+        time_limit - жёсткий лимит времени в секундах, node_limit - лимит узлов.
+        callback(result) вызывается после каждой завершённой итерации.
+        Возвращает SearchResult последней завершённой итерации."""
+        start = time.perf_counter()
+        self.nodes = 0
+        self.deadline = start + time_limit if time_limit is not None else None
+        self.node_limit = node_limit
+        self.can_stop = False
+        if self.tt is not None:
+            self.tt.new_search()
+        self.ordering.new_search()
+
+        moves = list(board.generate_legal_moves())
+        if not moves:
+            score = -MATE_SCORE if in_check(board) else 0
+            return SearchResult(None, score, 0, [], 0, 0.0)
+
+        if self.book is not None:
+            move = self.book.choose(board)
+            if move is not None:
+                return SearchResult(move, 0, 0, [move], 0, time.perf_counter() - start)
+
+        result = SearchResult(moves[0], 0, 0, [moves[0]], 0, 0.0)
+        undo_depth = len(board.undo_stack)
+
+        for depth in range(1, max_depth + 1):
+            try:
+                score, pv = self.search_root(board, moves, depth, result.pv)
+            except SearchStopped:
+                # Возвращаем доску в исходное состояние
+                while len(board.undo_stack) > undo_depth:
+                    board.unmake_move()
+                break
+
+            result = SearchResult(pv[0], score, depth, pv, self.nodes, time.perf_counter() - start)
+            self.can_stop = True
+            if callback is not None:
+                callback(result)
+
+            # Найден мат - углубляться дальше незачем
+            if abs(score) >= MATE_SCORE - MAX_DEPTH:
+                break
+
+        return result._replace(nodes=self.nodes, time=time.perf_counter() - start)
+
+    def search_root(self, board, moves, depth, pv):
+        """Одна итерация поиска на глубину depth. Первым рассматривается ход
+        из главного варианта предыдущей итерации. Возвращает (оценка, главный вариант)."""
+        best_score = -INFINITY
+        best_pv = []
+        alpha, beta = -INFINITY, INFINITY
+
+        for move in self.ordering.order(board, moves, pv[0] if pv else None, 0):
+            board.make_move(move)
+            score, child_pv = self.negamax(board, depth - 1, -beta, -alpha, 1, pv[1:] if pv and move == pv[0] else [])
+            score = -score
+            board.unmake_move()
+
+            if score > best_score:
+                best_score = score
+                best_pv = [move] + child_pv
+                alpha = max(alpha, score)
+        return best_score, best_pv
+
+    def negamax(self, board, depth, alpha, beta, ply, pv):
+        """Альфа-бета поиск. Возвращает (оценка с точки зрения игрока, который делает ход, главный вариант)."""
+        if depth <= 0:
+            return self.quiescence(board, alpha, beta), []
+
+        self.count_node()
+        first = pv[0] if pv else None
+        alpha_orig = alpha
+
+        if self.tablebases is not None:
+            score = self.probe_tablebases(board, ply)
+            if score is not None:
+                return score, []
+
+        if self.tt is not None:
+            entry = self.tt.probe(board.hash)
+            if entry is not None:
+                tt_depth, flag, score, tt_move = entry
+                score = score_from_tt(score, ply)
+                # Вне главного варианта сохранённой оценки достаточной глубины хватает для ответа
+                if tt_depth >= depth and not pv:
+                    if flag == EXACT or flag == LOWER and score >= beta or flag == UPPER and score <= alpha:
+                        return score, []
+                if first is None:
+                    first = tt_move
+
+        best_pv = []
+        best_move = None
+        searched = 0  # Число рассмотренных ходов
+        for move in self.ordering.moves(board, first, ply):
+            board.make_move(move)
+            score, child_pv = self.negamax(board, depth - 1, -beta, -alpha, ply + 1,
+                                           pv[1:] if pv and move == pv[0] else [])
+            score = -score
+            board.unmake_move()
+
+            if score >= beta:
+                self.ordering.cutoff(board, move, depth, ply, searched)
+                self.store(board, depth, LOWER, beta, move, ply)
+                return beta, []
+            if score > alpha:
+                alpha = score
+                best_pv = [move] + child_pv
+                best_move = move
+            searched += 1
+
+        if not searched:
+            return (-MATE_SCORE + ply if in_check(board) else 0), []
+
+        self.store(board, depth, EXACT if alpha > alpha_orig else UPPER, alpha, best_move, ply)
+        return alpha, best_pv
+
+    def probe_tablebases(self, board, ply):
+        """Оценка позиции по таблицам эндшпилей или None, если позиции в таблицах нет."""
+        result = self.tablebases.probe(board)
+        if result is None:
+            return None
+        outcome, distance = result
+        if outcome == DRAW:
+            return 0
+        return outcome * (MATE_SCORE - ply - distance)
+
+    def store(self, board, depth, flag, score, move, ply):
+        """Сохраняет результат поиска позиции в таблице транспозиций."""
+        if self.tt is not None:
+            self.tt.store(board.hash, depth, flag, score_to_tt(score, ply), move)
+
+    def quiescence(self, board, alpha, beta):
+        """Форсированный вариант: перебираются только взятия и превращения,
+        пока позиция не станет спокойной."""
+        self.count_node()
+        stand_pat = evaluate(board)
+        if stand_pat >= beta:
+            return beta
+        alpha = max(alpha, stand_pat)
+
+        for move in self.ordering.captures(board):
+            board.make_move(move)
+            score = -self.quiescence(board, -beta, -alpha)
+            board.unmake_move()
+
+            if score >= beta:
+                return beta
+            alpha = max(alpha, score)
+        return alpha
+
+    def count_node(self):
+        """Учитывает узел и прерывает поиск, если исчерпан бюджет времени или узлов."""
+        self.nodes += 1
+        if not self.can_stop:
+            return
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchStopped
+        if self.deadline is not None and self.nodes % CHECK_LIMITS_EVERY == 0 and \
+                time.perf_counter() >= self.deadline:
+            raise SearchStopped
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Поиск лучшего хода для core.Board")
+    parser.add_argument("--fen", help="позиция в нотации FEN (по умолчанию - начальная)")
+    parser.add_argument("--moves", nargs="*", default=[], help="ходы от заданной позиции в формате UCI")
+    parser.add_argument("--depth", type=int, default=MAX_DEPTH, help="максимальная глубина")
+    parser.add_argument("--time", type=float, default=None, help="лимит времени на ход в секундах")
+    parser.add_argument("--nodes", type=int, default=None, help="лимит узлов на ход")
+    parser.add_argument("--hash", type=int, default=16, help="размер таблицы транспозиций в МБ (0 - без таблицы)")
+    parser.add_argument("--book", help="файл дебютной книги (см. book.py)")
+    parser.add_argument("--tablebases", help="каталог таблиц эндшпилей (см. tablebase.py)")
+    args = parser.parse_args(args)
+
+    board = Board.from_fen(args.fen) if args.fen else Board()
+    for text in args.moves:
+        move = uci_to_move(text)
+        if move not in board.generate_legal_moves():
+            print(f"Недопустимый ход: {text}")
+            return 1
+        board.make_move(move)
+
+    if args.depth == MAX_DEPTH and args.time is None and args.nodes is None:
+        args.depth = 4
+
+    def report(result):
+        nps = result.nodes / result.time if result.time else 0
+        print(f"глубина {result.depth} оценка {result.score} узлов {result.nodes} "
+              f"время {result.time:.2f} с {nps:.0f} узлов/с pv {' '.join(map(move_to_uci, result.pv))}")
+
+    tt = TranspositionTable(args.hash) if args.hash else None
+    book = OpeningBook(args.book) if args.book else None
+    tablebases = Tablebases(args.tablebases) if args.tablebases else None
+    engine = Engine(tt, book, tablebases)
+    result = engine.search(board, args.depth, args.time, args.nodes, callback=report)
+    if book is not None:
+        book.close()
+    if tablebases is not None:
+        tablebases.close()
+    print("лучший ход", move_to_uci(result.move) if result.move else "нет")
+    print("отсечения:", ", ".join(f"{name} {value}" for name, value in engine.ordering.stats().items()))
+    if tt is not None:
+        print("таблица транспозиций:", ", ".join(f"{name} {value}" for name, value in tt.stats().items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""Подсчёт вызовов и времени работы методов core.Board, классов фигур и функций core.
+
+Пока сбор не включён, код core.py не меняется и ничего не замедляет. При входе в блок with
+методы и функции заменяются обёртками, которые считают вызовы и время, при выходе - возвращаются обратно.
+Результат можно выгрузить в JSON или в формате стеков для flame graph
+(строки вида "move_options;try_move;legal_targets 1234", время в микросекундах).
+
+Пример:
+    with Profiler() as profiler:
+        board.move_options(1, 4)
+    print(profiler.report())
+
+Запуск (perft под профилировщиком):
+    python instrumentation.py --depth 3 --format folded --output board.folded
+"""
+import argparse
+import inspect
+import json
+import sys
+import time
+
+import core
+from core import *
+from perft import perft
+
+# Функции модуля core, которые оборачиваются вместе с методами
+CORE_FUNCTIONS = ('slider_attacks', 'attacks', 'first_square')
+
+# Классы, методы которых оборачиваются
+CORE_CLASSES = (Board, Figure, Pawn, Knight, Bishop, Rook, Queen, King)
+
+
+class Profiler:
+    """Сборщик статистики вызовов. Одновременно может работать только один сборщик."""
+    active = None
+
+    def __init__(self, classes=CORE_CLASSES, functions=CORE_FUNCTIONS):
+        self.classes = classes
+        self.functions = functions
+        self.stats = {}  # Имя -> [число вызовов, общее время, собственное время]
+        self.stacks = {}  # Стек имён -> собственное время
+        self._frames = []  # Активные вызовы: [имя, время вложенных вызовов]
+        self._originals = []  # (объект, имя атрибута, исходное значение)
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *args):
+        self.disable()
+
+    def enable(self):
+        """Заменить методы и функции обёртками."""
+        if Profiler.active is not None:
+            raise RuntimeError("Профилировщик уже включён")
+        Profiler.active = self
+        for cls in self.classes:
+            for name, value in list(vars(cls).items()):
+                if inspect.isfunction(value) and not name.startswith('__'):
+                    self._replace(cls, name, value, f"{cls.__name__}.{name}")
+        for name in self.functions:
+            self._replace(core, name, getattr(core, name), name)
+
+    def disable(self):
+        """Вернуть исходные методы и функции."""
+        for owner, name, value in reversed(self._originals):
+            setattr(owner, name, value)
+        self._originals = []
+        Profiler.active = None
+
+    def _replace(self, owner, name, func, label):
+        self._originals.append((owner, name, func))
+        setattr(owner, name, self._wrap_generator(func, label) if inspect.isgeneratorfunction(func)
+                else self._wrap(func, label))
+
+    def _enter(self, label):
+        self._frames.append([label, 0.0])
+        return time.perf_counter()
+
+    def _exit(self, start, count):
+        elapsed = time.perf_counter() - start
+        label, children = self._frames.pop()
+        own = elapsed - children
+
+        item = self.stats.get(label)
+        if item is None:
+            item = self.stats[label] = [0, 0.0, 0.0]
+        item[0] += count
+        # При рекурсии общее время учитывается только у внешнего вызова
+        if all(frame[0] != label for frame in self._frames):
+            item[1] += elapsed
+        item[2] += own
+
+        stack = tuple(frame[0] for frame in self._frames) + (label,)
+        self.stacks[stack] = self.stacks.get(stack, 0.0) + own
+        if self._frames:
+            self._frames[-1][1] += elapsed
+
+    def _wrap(self, func, label):
+        def wrapper(*args, **kwargs):
+            start = self._enter(label)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._exit(start, 1)
+
+        wrapper.__wrapped__ = func
+        return wrapper
+
+    def _wrap_generator(self, func, label):
+        """Обёртка генератора: время считается на каждом шаге, вызов - один раз."""
+        def wrapper(*args, **kwargs):
+            generator = func(*args, **kwargs)
+            count = 1
+            while True:
+                start = self._enter(label)
+                try:
+                    value = next(generator)
+                except StopIteration:
+                    self._exit(start, count)
+                    return
+                except BaseException:
+                    self._exit(start, count)
+                    raise
+                self._exit(start, count)
+                count = 0
+                yield value
+
+        wrapper.__wrapped__ = func
+        return wrapper
+
+    def to_dict(self):
+        """Статистика в виде словаря: имя -> {calls, total, own} (время в секундах)."""
+        return {label: {"calls": calls, "total": total, "own": own}
+                for label, (calls, total, own) in sorted(self.stats.items(), key=lambda item: -item[1][1])}
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
+
+    def folded(self):
+        """Стеки вызовов в формате flame graph: "имя;имя;имя время_в_мкс" по строке на стек."""
+        return "\n".join(f"{';'.join(stack)} {round(own * 1e6)}"
+                         for stack, own in sorted(self.stacks.items()) if round(own * 1e6) > 0)
+
+    def report(self, limit=30):
+        """Таблица самых долгих методов."""
+        lines = [f"{'метод':<36} {'вызовов':>10} {'всего, мс':>12} {'своё, мс':>12}"]
+        for label, item in list(self.to_dict().items())[:limit]:
+            lines.append(f"{label:<36} {item['calls']:>10} {item['total'] * 1000:>12.2f} {item['own'] * 1000:>12.2f}")
+        return "\n".join(lines)
+
+
+def profile(func, *args, **kwargs):
+    """Выполнить func(*args, **kwargs) под профилировщиком. Возвращает (результат, Profiler)."""
+    with Profiler() as profiler:
+        result = func(*args, **kwargs)
+    return result, profiler
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Профилирование core.Board на perft")
+    parser.add_argument("--fen", help="позиция в нотации FEN (по умолчанию - начальная)")
+    parser.add_argument("--depth", type=int, default=2, help="глубина perft")
+    parser.add_argument("--format", choices=("table", "json", "folded"), default="table", help="формат вывода")
+    parser.add_argument("--output", help="файл для вывода (по умолчанию - стандартный вывод)")
+    args = parser.parse_args(args)
+
+    board = Board.from_fen(args.fen) if args.fen else Board()
+    nodes, profiler = profile(perft, board, args.depth)
+
+    text = {"table": profiler.report, "json": profiler.to_json, "folded": profiler.folded}[args.format]()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    print(f"Позиций: {nodes}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
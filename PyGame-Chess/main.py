@@ -1,5 +1,8 @@
+import argparse
 import os
 import sys
+import time
+from collections import OrderedDict
 
 import pygame
 
@@ -54,6 +57,17 @@ def gen_piece_image_name(image_name, color):
     return f"{color_name}_{image_name}.png"
 
 
+def load_piece_images():
+    """Загрузить изображения фигур: фигура -> цвет -> изображение"""
+    images = dict()
+    for piece, name in PIECES_IMAGES_NAMES.items():
+        item = dict()
+        for color in BLACK, WHITE:
+            item[color] = load_image(gen_piece_image_name(name, color))
+        images[piece] = item
+    return images
+
+
 def human_format(coordinates):
     """Преобразование координат в читаемый вид"""
     row, col = coordinates
@@ -68,16 +82,16 @@ def start_screen():
     pygame.display.flip()
 
     while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                terminate()
-            elif event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
-                return
+        event = pygame.event.wait()
+        if event.type == pygame.QUIT:
+            terminate()
+        elif event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
+            return
 
 
 def start_new_game():
     global game
-    game = Game()
+    game = Game(render_cache)
 
 
 def flip_board():
@@ -85,10 +99,138 @@ def flip_board():
     board_reversed = not board_reversed
 
 
-class Game:
-    """Класс игры"""
+class LoopStats:
+    """Статистика цикла событий: время ожидания событий, кадры и загрузка процессора"""
 
     def __init__(self):
+        self.start_time = time.perf_counter()
+        self.start_cpu = time.process_time()
+        self.idle_time = 0.0  # Время ожидания событий
+        self.idle_cpu = 0.0  # Процессорное время, потраченное во время ожидания
+        self.frames = 0
+        self.events = 0
+
+    def wait(self):
+        """Дождаться события, учитывая время ожидания"""
+        start_time, start_cpu = time.perf_counter(), time.process_time()
+        event = pygame.event.wait()
+        self.idle_time += time.perf_counter() - start_time
+        self.idle_cpu += time.process_time() - start_cpu
+        return event
+
+    def report(self):
+        """Строка со статистикой"""
+        elapsed = time.perf_counter() - self.start_time
+        cpu = time.process_time() - self.start_cpu
+        idle_load = self.idle_cpu / self.idle_time * 100 if self.idle_time else 0.0
+        return (f"{elapsed:.0f} с: событий {self.events}, кадров {self.frames}, "
+                f"ожидание {self.idle_time / elapsed * 100 if elapsed else 0:.1f}% времени, "
+                f"загрузка CPU {cpu / elapsed * 100 if elapsed else 0:.1f}%, "
+                f"в простое {idle_load:.1f}%")
+
+
+def present(screen, full=False):
+    """Вывести на экран изменения после обработки событий"""
+    if INCREMENTAL_RENDER and not full:
+        pygame.display.update(game.render_changes(screen))
+    else:
+        game.render(screen)
+        pygame.display.flip()
+
+
+def run_event_loop(screen, max_fps=None, stats_interval=None):
+    """Цикл обработки событий. Пока событий нет, процесс спит в pygame.event.wait;
+    кадр выводится только после изменений и не чаще max_fps раз в секунду.
+    Если задан stats_interval, каждые stats_interval секунд печатается статистика LoopStats"""
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed([event_type for event_type in LOOP_EVENTS if event_type is not None])
+    if stats_interval:
+        pygame.time.set_timer(STATS_EVENT, int(stats_interval * 1000))
+
+    clock = pygame.time.Clock()
+    stats = LoopStats()
+    while True:
+        # Ждём первое событие, затем забираем все накопившиеся и выводим один кадр
+        events = [stats.wait()] + pygame.event.get()
+        stats.events += len(events)
+
+        changed = exposed = False
+        for event in events:
+            if event.type == pygame.QUIT:
+                if stats_interval:
+                    print(stats.report())
+                terminate()
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                game.get_click(event.pos)
+                changed = True
+            elif event.type == STATS_EVENT:
+                print(stats.report())
+            else:
+                # Окно было перекрыто или изменено - нужна полная перерисовка
+                exposed = True
+
+        if changed or exposed:
+            present(screen, full=exposed)
+            stats.frames += 1
+            if max_fps:
+                clock.tick(max_fps)
+
+
+class RenderCache:
+    """Кеш ресурсов для отрисовки: масштабированные изображения фигур, шрифты и надписи.
+    Изображения и надписи сбрасываются при изменении размеров элементов (set_layout)"""
+
+    def __init__(self, images):
+        self.images = images  # Исходные изображения: фигура -> цвет -> изображение
+        self.layout = None
+        self.sprites = dict()  # (фигура, цвет, размер) -> изображение
+        self.fonts = dict()  # размер -> шрифт
+        self.texts = OrderedDict()  # (строка, размер) -> изображение надписи, в порядке использования
+
+    def set_layout(self, layout):
+        """Задать размеры элементов; при их изменении кеш изображений очищается"""
+        if layout != self.layout:
+            self.layout = layout
+            self.sprites.clear()
+            self.texts.clear()
+
+    def sprite(self, piece, color, size):
+        """Изображение фигуры размером size x size"""
+        key = piece, color, size
+        image = self.sprites.get(key)
+        if image is None:
+            image = pygame.transform.scale(self.images[piece][color], (size, size))
+            self.sprites[key] = image
+        return image
+
+    def font(self, size):
+        """Шрифт заданного размера"""
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(None, size)
+            self.fonts[size] = font
+        return font
+
+    def text(self, string, size):
+        """Изображение надписи"""
+        key = string, size
+        text = self.texts.get(key)
+        if text is None:
+            # Записи истории со временем меняются, поэтому число надписей ограничено:
+            # вытесняется надпись, которая дольше всех не использовалась
+            if len(self.texts) >= TEXT_CACHE_SIZE:
+                self.texts.popitem(last=False)
+            text = self.font(size).render(string, True, MAIN_COLOR)
+            self.texts[key] = text
+        else:
+            self.texts.move_to_end(key)
+        return text
+
+
+class Game:
+    """Класс игры. Кеш отрисовки cache общий для всех партий, поэтому новая игра не загружает изображения заново"""
+
+    def __init__(self, cache):
         self.board = Board()
         self.history = []
         self.selected_cell = None
@@ -100,6 +242,7 @@ class Game:
 
         self.winner = None
         self.is_check = False
+        self.stalemate = False
 
         self.left_indent = 70
         self.top_indent = 90
@@ -114,12 +257,10 @@ class Game:
         self.selector_height = self.selector_cell_size = self.selector_width // len(SELECTOR_PIECES)
         self.selector_top = int(self.top_indent + self.cell_size * self.height / 2 - self.selector_height / 2)
 
-        self.pieces = dict()
-        for piece, name in PIECES_IMAGES_NAMES.items():
-            item = dict()
-            for color in BLACK, WHITE:
-                item[color] = load_image(gen_piece_image_name(name, color))
-            self.pieces[piece] = item
+        self.cache = cache
+        self.static_layer = None
+        self.static_key = None
+        self.frame = None  # Состояние экрана после последней отрисовки
 
         self.buttons = self.get_buttons()
 
@@ -163,215 +304,318 @@ class Game:
         y = self.top_indent + self.cell_size * row
         return x, y
 
-    def render(self, screen):
-        def write_text(string, x, y, size):
-            """Написать текст"""
-            font = pygame.font.Font(None, size)
-            text = font.render(string, True, MAIN_COLOR)
-            text_x = x - text.get_width() // 2
-            text_y = y - text.get_height() // 2
-            screen.blit(text, (text_x, text_y))
+    def get_layout(self):
+        """Размеры элементов, от которых зависят закешированные изображения"""
+        return self.cell_size, self.selector_cell_size
+
+    def get_cell_rect(self, coordinates):
+        """Прямоугольник клетки на экране"""
+        return pygame.Rect(self.get_position(coordinates), (self.cell_size, self.cell_size))
+
+    def get_move_rect(self):
+        """Область надписи о том, чей ход"""
+        left = self.left_indent - self.border_width
+        return pygame.Rect(left, 0, self.cell_size * self.width + self.border_width * 2,
+                           self.top_indent - self.border_width - 1)
+
+    def get_winner_rect(self):
+        """Область надписи о шахе/победителе"""
+        left = self.left_indent - self.border_width
+        top = self.top_indent + self.cell_size * self.height + self.border_width + 1
+        return pygame.Rect(left, top, self.cell_size * self.width + self.border_width * 2, HEIGHT - top)
+
+    def get_history_rect(self):
+        """Область истории ходов (до верхней кнопки)"""
+        left = self.left_indent + self.cell_size * self.width + self.border_width + 80 - 65
+        bottom = min(button["top"] for button in self.buttons) - 5
+        return pygame.Rect(left, 0, 130 * 2, bottom)
+
+    def write_text(self, screen, string, x, y, size):
+        """Написать текст"""
+        text = self.cache.text(string, size)
+        text_x = x - text.get_width() // 2
+        text_y = y - text.get_height() // 2
+        screen.blit(text, (text_x, text_y))
+
+    def draw_borders(self, screen):
+        """Нарисовать границы доски"""
+        color = MAIN_COLOR
+
+        inner_rect = (self.left_indent - 1, self.top_indent - 1,
+                      self.cell_size * self.width + 2, self.cell_size * self.height + 2)
+        outer_rect = (inner_rect[0] - self.border_width, inner_rect[1] - self.border_width,
+                      inner_rect[2] + self.border_width * 2, inner_rect[3] + self.border_width * 2)
+
+        pygame.draw.rect(screen, color, inner_rect, 1)
+        pygame.draw.rect(screen, color, outer_rect, 1)
+
+    def draw_scales(self, screen):
+        """Нарисовать линейки рядом с доской"""
+        size = 30
+
+        for i in range(self.height):
+            number = i if not board_reversed else 7 - i
+            y = self.top_indent + self.cell_size * (self.height - i - 0.5)
+            for x in (self.left_indent - self.border_width // 2,
+                      self.left_indent + self.cell_size * self.width + self.border_width // 2):
+                self.write_text(screen, str(number + 1), x, y, size)
+
+        for i in range(self.width):
+            x = self.left_indent + self.cell_size * (i + 0.5)
+            for y in (self.top_indent - self.border_width // 2,
+                      self.top_indent + self.cell_size * self.height + self.border_width // 2):
+                self.write_text(screen, chr(ord('A') + i), x, y, size)
+
+    def get_move_text(self):
+        """Надпись о том, чей ход"""
+        side = "БЕЛЫХ" if self.board.color == WHITE else "ЧЁРНЫХ"
+        return "ХОД " + side
+
+    def draw_move(self, screen):
+        """Написать чей ход"""
+        size = 40
+        x = self.left_indent + self.cell_size * (self.width / 2)
+        y = self.top_indent - self.border_width - 30
+        self.write_text(screen, self.get_move_text(), x, y, size)
+
+    def get_winner_text(self):
+        """Надпись о шахе/победителе или None"""
+        if self.winner in (BLACK, WHITE):
+            side = "БЕЛЫЕ" if self.winner == WHITE else "ЧЁРНЫЕ"
+            return "ПОБЕДИЛИ " + side
+        if self.stalemate:
+            return "ПАТ"
+        if self.is_check:
+            return "ШАХ"
+        return None
+
+    def draw_winner(self, screen):
+        """Написать информацию о шахе/победителе"""
+        text = self.get_winner_text()
+        if not text:
+            return
+
+        size = 40
+        x = self.left_indent + self.cell_size * (self.width / 2)
+        y = self.top_indent + self.cell_size * self.height + self.border_width + 30
+        self.write_text(screen, text, x, y, size)
+
+    def draw_cells(self, screen):
+        """Нарисовать сетку"""
+        mod = {
+            0: MAIN_COLOR,
+            1: BACKGROUND_COLOR
+        }
+        for y in range(self.height):
+            for x in range(self.width):
+                rect = (self.left_indent + self.cell_size * x, self.top_indent + self.cell_size * y,
+                        self.cell_size, self.cell_size)
+                color = mod[(x + y) % 2]
+                pygame.draw.rect(screen, color, rect, 0)
+
+    def draw_piece(self, screen, row, col):
+        """Отрисовать фигуру на клетке, если она там есть"""
+        piece = self.board.field[row][col]
+        if isinstance(piece, Figure):
+            image = self.cache.sprite(piece.__class__, piece.color, self.cell_size)
+            rect = image.get_rect().move(*self.get_position((row, col)))
+            screen.blit(image, rect)
+
+    def draw_pieces(self, screen):
+        """Отрисовать фигуры"""
+        for row in range(self.height):
+            for col in range(self.width):
+                self.draw_piece(screen, row, col)
+
+    def draw_cell_borders(self, screen, coordinates, color):
+        """Выделить клетку"""
+        x, y = self.get_position(coordinates)
+        width = 3
+        indent = 4
+        rect = (x + indent, y + indent,
+                self.cell_size - indent * 2, self.cell_size - indent * 2)
+        pygame.draw.rect(screen, color, rect, width)
+
+    def get_marked_cells(self):
+        """Словарь: координаты выбранной и доступных для хода клеток -> цвет выделения"""
+        if not self.selected_cell:
+            return {}
+        marked = {coords: AVAILABLE_MOVES_COLOR for coords in self.board.move_options(*self.selected_cell)}
+        marked[self.selected_cell] = SELECTED_CELL_COLOR
+        return marked
+
+    def draw_selected_cells_borders(self, screen, marked):
+        """Выделить выбранную и доступные для хода клетки"""
+        for coords, color in marked.items():
+            self.draw_cell_borders(screen, coords, color)
+
+    def get_history_records(self):
+        """Последние записи истории, которые помещаются на экран"""
+        count = 9 * 2
+        return self.history[-count:] if len(self.history) % 2 == 0 else self.history[-count + 1:]
+
+    def draw_history(self, screen):
+        """Отобразить историю ходов"""
+        indent = 40
+
+        x_first = self.left_indent + self.cell_size * self.width + self.border_width + 80
+        x_second = x_first + 130
+        y = self.top_indent - self.border_width - 30
+        self.write_text(screen, "ИСТОРИЯ", (x_first + x_second) // 2, y, 40)
+        y += 5
+
+        for i, record in enumerate(self.get_history_records()):
+            if i % 2 == 0:
+                x = x_first
+                y += indent
+            else:
+                x = x_second
+            self.write_text(screen, record, x, y, 30)
+
+    def draw_buttons(self, screen):
+        """Отрисовать кнопки"""
+        for button in self.buttons:
+            left, top, right, bottom = button["left"], button["top"], button["right"], button["bottom"]
+            width, height = right - left, bottom - top
+            rect = (left, top, width, height)
+            pygame.draw.rect(screen, MAIN_COLOR, rect, 1)
+            self.write_text(screen, button["title"], left + width // 2, top + height // 2, button["size"])
+
+    def draw_pieces_selector(self, screen):
+        """Отрисовать окно выбора фигур для превращения пешки"""
+        text_height = 40
+
+        def draw_background():
+            color = BACKGROUND_COLOR
+            rect = (self.selector_left, self.selector_top - text_height,
+                    self.selector_width, self.selector_height + text_height)
+            pygame.draw.rect(screen, color, rect, 0)
 
         def draw_borders():
-            """Нарисовать границы доски"""
             color = MAIN_COLOR
+            width = 1
 
-            inner_rect = (self.left_indent - 1, self.top_indent - 1,
-                          self.cell_size * self.width + 2, self.cell_size * self.height + 2)
-            outer_rect = (inner_rect[0] - self.border_width, inner_rect[1] - self.border_width,
-                          inner_rect[2] + self.border_width * 2, inner_rect[3] + self.border_width * 2)
+            rect = (self.selector_left, self.selector_top - text_height,
+                    self.selector_width, self.selector_height + text_height)
+            pygame.draw.rect(screen, color, rect, width)
 
-            pygame.draw.rect(screen, color, inner_rect, 1)
-            pygame.draw.rect(screen, color, outer_rect, 1)
+            for i in range(len(SELECTOR_PIECES)):
+                rect = (self.selector_left + i * self.selector_cell_size,
+                        self.selector_top, self.selector_cell_size, self.selector_height)
+                pygame.draw.rect(screen, color, rect, width)
 
-        def draw_scales():
-            """Нарисовать линейки рядом с доской"""
+        def draw_title():
+            x = self.selector_left + self.selector_width // 2
+            y = self.selector_top - text_height // 2
+            title = "Выберите фигуру"
             size = 30
-
-            for i in range(self.height):
-                number = i if not board_reversed else 7 - i
-                y = self.top_indent + self.cell_size * (self.height - i - 0.5)
-                for x in (self.left_indent - self.border_width // 2,
-                          self.left_indent + self.cell_size * self.width + self.border_width // 2):
-                    write_text(str(number + 1), x, y, size)
-
-            for i in range(self.width):
-                x = self.left_indent + self.cell_size * (i + 0.5)
-                for y in (self.top_indent - self.border_width // 2,
-                          self.top_indent + self.cell_size * self.height + self.border_width // 2):
-                    write_text(chr(ord('A') + i), x, y, size)
-
-        def draw_move():
-            """Написать чей ход"""
-            side = "БЕЛЫХ" if self.board.color == WHITE else "ЧЁРНЫХ"
-            size = 40
-            x = self.left_indent + self.cell_size * (self.width / 2)
-            y = self.top_indent - self.border_width - 30
-            write_text("ХОД " + side, x, y, size)
-
-        def draw_winner():
-            """Написать информацию о шахе/победителе"""
-            text = None
-            if self.winner in (BLACK, WHITE):
-                side = "БЕЛЫЕ" if self.winner == WHITE else "ЧЁРНЫЕ"
-                text = "ПОБЕДИЛИ " + side
-            elif self.is_check:
-                text = "ШАХ"
-
-            if not text:
-                return
-
-            size = 40
-            x = self.left_indent + self.cell_size * (self.width / 2)
-            y = self.top_indent + self.cell_size * self.height + self.border_width + 30
-            write_text(text, x, y, size)
-
-        def draw_cells():
-            """Нарисовать сетку"""
-            mod = {
-                0: MAIN_COLOR,
-                1: BACKGROUND_COLOR
-            }
-            for y in range(self.height):
-                for x in range(self.width):
-                    rect = (self.left_indent + self.cell_size * x, self.top_indent + self.cell_size * y,
-                            self.cell_size, self.cell_size)
-                    color = mod[(x + y) % 2]
-                    pygame.draw.rect(screen, color, rect, 0)
-
-        def draw_pieces():
-            """Отрисовать фигуры"""
-
-            def draw_piece():
-                orig_image = self.pieces[piece.__class__][piece.color]
-                image = pygame.transform.scale(orig_image, (self.cell_size, self.cell_size))
-                rect = image.get_rect().move(*self.get_position((row, col)))
+            self.write_text(screen, title, x, y, size)
+
+        def draw_selector_pieces():
+            for i, piece in enumerate(SELECTOR_PIECES):
+                image = self.cache.sprite(piece, self.board.color, self.selector_cell_size)
+                x = self.selector_left + i * self.selector_cell_size
+                y = self.selector_top
+                rect = image.get_rect().move(x, y)
                 screen.blit(image, rect)
 
-            for row, line in enumerate(self.board.field):
-                for col, piece in enumerate(line):
-                    if isinstance(piece, Figure):
-                        draw_piece()
-
-        def draw_selected_cells_borders():
-            """Выделить выбранную и доступные для хода клетки"""
-
-            def draw_cell_borders(coordinates, color):
-                """Выделить клетку"""
-                x, y = self.get_position(coordinates)
-                width = 3
-                indent = 4
-                rect = (x + indent, y + indent,
-                        self.cell_size - indent * 2, self.cell_size - indent * 2)
-                pygame.draw.rect(screen, color, rect, width)
-
-            if not self.selected_cell:
-                return
-
-            draw_cell_borders(self.selected_cell, SELECTED_CELL_COLOR)
-            for coords in self.board.move_options(*self.selected_cell):
-                draw_cell_borders(coords, AVAILABLE_MOVES_COLOR)
-
-        def draw_history():
-            """Отобразить историю ходов"""
-            indent = 40
-
-            x_first = self.left_indent + self.cell_size * self.width + self.border_width + 80
-            x_second = x_first + 130
-            y = self.top_indent - self.border_width - 30
-            write_text("ИСТОРИЯ", (x_first + x_second) // 2, y, 40)
-            y += 5
-
-            count = 9 * 2
-            last_records = self.history[-count:] if len(self.history) % 2 == 0 else self.history[-count + 1:]
-            for i, record in enumerate(last_records):
-                if i % 2 == 0:
-                    x = x_first
-                    y += indent
-                else:
-                    x = x_second
-                write_text(record, x, y, 30)
-
-        def draw_buttons():
-            """Отрисовать кнопки"""
-            for button in self.buttons:
-                left, top, right, bottom = button["left"], button["top"], button["right"], button["bottom"]
-                width, height = right - left, bottom - top
-                rect = (left, top, width, height)
-                pygame.draw.rect(screen, MAIN_COLOR, rect, 1)
-                write_text(button["title"], left + width // 2, top + height // 2, button["size"])
-
-        def draw_pieces_selector():
-            """Отрисовать окно выбора фигур для превращения пешки"""
-            text_height = 40
-
-            def draw_background():
-                color = BACKGROUND_COLOR
-                rect = (self.selector_left, self.selector_top - text_height,
-                        self.selector_width, self.selector_height + text_height)
-                pygame.draw.rect(screen, color, rect, 0)
-
-            def draw_borders():
-                color = MAIN_COLOR
-                width = 1
-
-                rect = (self.selector_left, self.selector_top - text_height,
-                        self.selector_width, self.selector_height + text_height)
-                pygame.draw.rect(screen, color, rect, width)
-
-                for i in range(len(SELECTOR_PIECES)):
-                    rect = (self.selector_left + i * self.selector_cell_size,
-                            self.selector_top, self.selector_cell_size, self.selector_height)
-                    pygame.draw.rect(screen, color, rect, width)
-
-            def draw_title():
-                x = self.selector_left + self.selector_width // 2
-                y = self.selector_top - text_height // 2
-                title = "Выберите фигуру"
-                size = 30
-                write_text(title, x, y, size)
-
-            def draw_selector_pieces():
-                for i, piece in enumerate(SELECTOR_PIECES):
-                    orig_image = self.pieces[piece][self.board.color]
-                    image = pygame.transform.scale(orig_image, (self.selector_cell_size,) * 2)
-                    x = self.selector_left + i * self.selector_cell_size
-                    y = self.selector_top
-                    rect = image.get_rect().move(x, y)
-                    screen.blit(image, rect)
-
-            if not self.promoting_cell:
-                return
-            draw_background()
-            draw_borders()
-            draw_title()
-            draw_selector_pieces()
-
-        screen.fill(BACKGROUND_COLOR)
-
-        draw_borders()
-        draw_scales()
-        draw_cells()
-        draw_selected_cells_borders()
-        draw_move()
-        draw_winner()
-        draw_pieces()
-        draw_history()
-        draw_buttons()
-        draw_pieces_selector()
-
-    def check_winner(self, row, col):
-        """Проверка, может ли фигура поставить шах/мат"""
-        result = self.board.check_and_mate(row, col)
-        if result is None:
-            self.is_check = False
-            return
-        if result == CHECK:
-            self.is_check = True
+        if not self.promoting_cell:
             return
+        draw_background()
+        draw_borders()
+        draw_title()
+        draw_selector_pieces()
+
+    def get_static_layer(self):
+        """Неизменяемая часть экрана: фон, границы, линейки, клетки и кнопки.
+        Перерисовывается только при изменении размеров или переворота доски"""
+        key = self.get_layout(), board_reversed
+        if self.static_key != key:
+            self.cache.set_layout(self.get_layout())
+            self.static_layer = pygame.Surface(SIZE)
+            self.static_layer.fill(BACKGROUND_COLOR)
+            self.draw_borders(self.static_layer)
+            self.draw_scales(self.static_layer)
+            self.draw_cells(self.static_layer)
+            self.draw_buttons(self.static_layer)
+            self.static_key = key
+        return self.static_layer
+
+    def get_frame(self, marked):
+        """Состояние изменяемой части экрана, по которому определяется, что нужно перерисовать"""
+        cells = dict()
+        for row, line in enumerate(self.board.field):
+            for col, piece in enumerate(line):
+                figure = (piece.__class__, piece.color) if isinstance(piece, Figure) else None
+                cells[row, col] = figure, marked.get((row, col))
+        return {
+            "static": self.static_key,
+            "promoting": self.promoting_cell,
+            "cells": cells,
+            "move": self.get_move_text(),
+            "winner": self.get_winner_text(),
+            "history": tuple(self.get_history_records())
+        }
+
+    def render(self, screen):
+        """Полностью перерисовать экран. Возвращает список изменённых прямоугольников"""
+        screen.blit(self.get_static_layer(), (0, 0))
+
+        marked = self.get_marked_cells()
+        self.draw_selected_cells_borders(screen, marked)
+        self.draw_move(screen)
+        self.draw_winner(screen)
+        self.draw_pieces(screen)
+        self.draw_history(screen)
+        self.draw_pieces_selector(screen)
+
+        self.frame = self.get_frame(marked)
+        return [screen.get_rect()]
+
+    def render_changes(self, screen):
+        """Перерисовать только то, что изменилось с прошлой отрисовки:
+        клетки, надписи и историю. Возвращает список изменённых прямоугольников"""
+        static = self.get_static_layer()
+        marked = self.get_marked_cells()
+        frame = self.get_frame(marked)
+        last = self.frame
+
+        # Окно выбора фигуры перекрывает доску, поэтому при его появлении и скрытии экран рисуется заново
+        if last is None or last["static"] != frame["static"] or last["promoting"] != frame["promoting"]:
+            return self.render(screen)
+
+        rects = []
+        for coords, state in frame["cells"].items():
+            if last["cells"][coords] == state:
+                continue
+            rect = self.get_cell_rect(coords)
+            screen.blit(static, rect, rect)
+            if coords in marked:
+                self.draw_cell_borders(screen, coords, marked[coords])
+            self.draw_piece(screen, *coords)
+            rects.append(rect)
+
+        for name, rect, draw in (("move", self.get_move_rect(), self.draw_move),
+                                 ("winner", self.get_winner_rect(), self.draw_winner),
+                                 ("history", self.get_history_rect(), self.draw_history)):
+            if last[name] != frame[name]:
+                screen.blit(static, rect, rect)
+                draw(screen)
+                rects.append(rect)
+
+        self.frame = frame
+        return rects
+
+    def check_winner(self):
+        """Проверка шаха, мата и пата после хода"""
+        result = self.board.status()
+        self.is_check = result == CHECK
         if result == MATE:
             self.winner = opponent(self.board.color)
             self.locked = True
+        elif result == STALEMATE:
+            self.stalemate = True
+            self.locked = True
 
     def add_to_history(self, row1, col1, row2, col2):
         """Добавить запись в историю"""
@@ -419,7 +663,7 @@ class Game:
 
         if isinstance(cell, Figure) and self.board.try_move(row1, col1, row2, col2):
             self.board.move_piece(row1, col1, row2, col2)
-            self.check_winner(row2, col2)
+            self.check_winner()
             # Добавить запись в историю
             self.add_to_history(row1, col1, row2, col2)
         self.selected_cell = None
@@ -439,7 +683,7 @@ class Game:
             piece = self.get_piece_from_selector(mouse_pos)
             if piece:
                 self.board.move_and_promote_pawn(*self.promoting_cell, piece)
-                self.check_winner(*self.promoting_cell[2:])
+                self.check_winner()
                 self.add_to_history(*self.promoting_cell)
                 self.promoting_cell = None
             return
@@ -472,12 +716,30 @@ START_SCREEN_IMAGE = "start_screen.png"
 
 SELECTOR_PIECES = (Pawn, Rook, Knight, Bishop, Queen)
 
+TEXT_CACHE_SIZE = 256  # Наибольшее число закешированных надписей
+
+INCREMENTAL_RENDER = True  # Перерисовывать только изменившиеся части экрана
+
+MAX_FPS = 60  # Наибольшая частота кадров по умолчанию, 0 - без ограничения
+
+STATS_EVENT = pygame.USEREVENT  # Событие таймера для вывода статистики цикла
+
+# События, которые обрабатывает цикл; остальные (например, движение мыши) не будят процесс
+LOOP_EVENTS = (pygame.QUIT, pygame.MOUSEBUTTONDOWN, pygame.VIDEOEXPOSE,
+               getattr(pygame, "WINDOWEXPOSED", None), STATS_EVENT)
+
 BUTTONS = [
     ("ПЕРЕВЕРНУТЬ ДОСКУ", 26, flip_board),
     ("НОВАЯ ИГРА", 36, start_new_game)
 ]
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=CAPTION)
+    parser.add_argument("--fps", type=int, default=MAX_FPS, help="наибольшая частота кадров, 0 - без ограничения")
+    parser.add_argument("--stats", type=float, default=0,
+                        help="печатать статистику цикла (ожидание, загрузка CPU) каждые STATS секунд")
+    args = parser.parse_args()
+
     pygame.init()
     pygame.display.set_caption(CAPTION)
     screen = pygame.display.set_mode(SIZE)
@@ -489,18 +751,8 @@ if __name__ == "__main__":
 
     board_reversed = False
 
-    game = Game()
-    game.render(screen)
+    render_cache = RenderCache(load_piece_images())
+    game = Game(render_cache)
+    present(screen, full=True)
 
-    running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                terminate()
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                game.get_click(event.pos)
-                game.render(screen)
-
-        pygame.display.flip()
-
-    pygame.quit()
+    run_event_loop(screen, args.fps, args.stats)
@@ -0,0 +1,156 @@
+"""Порядок перебора ходов для альфа-бета поиска.
+
+Чем раньше рассматривается лучший ход, тем больше отсечений. Ходы выдаются по этапам:
+    1. ход из таблицы транспозиций или главного варианта;
+    2. взятия и превращения по MVV-LVA (сначала самая ценная жертва, затем самый дешёвый нападающий);
+    3. ходы-убийцы: два последних тихих хода, вызвавших отсечение на этом же расстоянии от корня;
+    4. остальные тихие ходы по таблице истории (butterfly: цвет, клетка начала, клетка конца),
+       в которую добавляется depth * depth за каждое отсечение тихим ходом.
+Ходы каждого этапа генерируются, только если до него дошёл перебор: ход из таблицы проверяется
+без построения списка всех ходов, взятия генерируются только в клетки фигур соперника.
+
+Для оценки порядка считается, какая доля отсечений происходит на первом ходе.
+"""
+from core import *
+
+KILLER_SLOTS = 2  # Ходов-убийц на одно расстояние от корня
+HISTORY_LIMIT = 1 << 20  # При превышении значения таблицы истории уменьшаются вдвое
+MAX_PLY = 128  # Наибольшее расстояние от корня для ходов-убийц
+
+# Оценки этапов: ходы предыдущих этапов всегда впереди
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 28
+KILLER_SCORE = 1 << 26
+
+# Горизонталь превращения пешек игрока
+PROMOTION_RANKS = {WHITE: 0xff << 56, BLACK: 0xff}
+
+
+def mvv_lva(board, move):
+    """Оценка взятия или превращения: ценность жертвы (и ферзя при превращении), затем дешевизна нападающего."""
+    victim = board.squares[square(move.row1, move.col1)] & 7
+    attacker = board.squares[square(move.row, move.col)] & 7
+    if not victim and attacker == PAWN and (move.row1, move.col1) == board.en_passant:
+        victim = PAWN
+    score = victim * 8 - attacker
+    if move.promotion is Queen:
+        score += QUEEN * 8
+    elif move.promotion is not None:
+        score -= KING * 8  # Превращение не в ферзя - после всех взятий
+    return score
+
+
+def is_tactical(board, move):
+    """Проверяет, является ли ход взятием (включая взятие на проходе) или превращением."""
+    return board.squares[square(move.row1, move.col1)] or move.promotion is not None or \
+        (move.row1, move.col1) == board.en_passant and board.squares[square(move.row, move.col)] & 7 == PAWN
+
+
+def tactical_moves(board):
+    """Допустимые взятия (включая взятие на проходе) и превращения текущего игрока."""
+    color = board.color
+    pawns = board.bitboards[color][PAWN]
+    moves = list(board.generate_legal_moves(targets=board.occupied[opponent(color)]))
+    if board.en_passant:
+        moves.extend(board.generate_legal_moves(origins=pawns, targets=1 << square(*board.en_passant)))
+    moves.extend(board.generate_legal_moves(origins=pawns, targets=PROMOTION_RANKS[color] & ~board.occupancy))
+    return moves
+
+
+def quiet_moves(board):
+    """Допустимые ходы текущего игрока, которые не являются взятиями или превращениями."""
+    return [move for move in board.generate_legal_moves(targets=ALL_SQUARES & ~board.occupied[opponent(board.color)])
+            if not is_tactical(board, move)]
+
+
+class MoveOrdering:
+    """Ходы-убийцы, таблица истории и статистика отсечений одного поиска."""
+
+    def __init__(self, max_ply=MAX_PLY):
+        self.killers = [[None] * KILLER_SLOTS for _ in range(max_ply)]
+        self.history = {WHITE: [0] * 4096, BLACK: [0] * 4096}  # Индекс - клетка начала * 64 + клетка конца
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def new_search(self):
+        """Начало нового поиска: ходы-убийцы забываются, история ослабевает."""
+        for slots in self.killers:
+            slots[:] = [None] * KILLER_SLOTS
+        for table in self.history.values():
+            table[:] = [value >> 1 for value in table]
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def history_score(self, color, move):
+        return self.history[color][square(move.row, move.col) << 6 | square(move.row1, move.col1)]
+
+    def order(self, board, moves, first=None, ply=None):
+        """Список ходов moves, упорядоченный так же, как при поэтапной выдаче."""
+        killers = self.killers[ply] if ply is not None and ply < len(self.killers) else ()
+
+        def key(move):
+            if move == first:
+                return -HASH_MOVE_SCORE
+            if is_tactical(board, move):
+                return -CAPTURE_SCORE - mvv_lva(board, move)
+            if move in killers:
+                return -KILLER_SCORE
+            return -self.history_score(board.color, move)
+
+        return sorted(moves, key=key)
+
+    def moves(self, board, first=None, ply=0):
+        """Генератор допустимых ходов по этапам. Доску между выдачами ходов можно менять,
+        если к следующему ходу она возвращается в исходную позицию."""
+        color = board.color
+        if first is not None and board.is_legal_move(first):
+            yield first
+        else:
+            first = None
+
+        tactical = tactical_moves(board)
+        tactical.sort(key=lambda move: -mvv_lva(board, move))
+        for move in tactical:
+            if move != first:
+                yield move
+
+        killers = [move for move in self.killers[ply] if move is not None and move != first and
+                   board.is_legal_move(move) and not is_tactical(board, move)] if ply < len(self.killers) else []
+        yield from killers
+
+        quiet = [move for move in quiet_moves(board) if move != first and move not in killers]
+        quiet.sort(key=lambda move: -self.history_score(color, move))
+        yield from quiet
+
+    def captures(self, board):
+        """Взятия и превращения по MVV-LVA (для форсированного варианта)."""
+        return sorted(tactical_moves(board), key=lambda move: -mvv_lva(board, move))
+
+    def cutoff(self, board, move, depth, ply, index):
+        """Ход move с номером index (с 0) вызвал отсечение на глубине depth."""
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        if is_tactical(board, move):
+            return
+
+        if ply < len(self.killers):
+            slots = self.killers[ply]
+            if slots[0] != move:
+                slots[1:] = slots[:-1]
+                slots[0] = move
+
+        table = self.history[board.color]
+        index = square(move.row, move.col) << 6 | square(move.row1, move.col1)
+        table[index] += depth * depth
+        if table[index] > HISTORY_LIMIT:
+            for values in self.history.values():
+                values[:] = [value >> 1 for value in values]
+
+    def stats(self):
+        """Статистика отсечений: всего, на первом ходе и доля отсечений на первом ходе."""
+        return {
+            "cutoffs": self.cutoffs,
+            "first_move_cutoffs": self.first_move_cutoffs,
+            "first_move_rate": round(self.first_move_cutoffs / self.cutoffs, 3) if self.cutoffs else 0.0
+        }
@@ -0,0 +1,194 @@
+"""Параллельный поиск на нескольких процессах.
+
+Два режима:
+- ParallelEngine.search - поиск хода в одной позиции с разделением корня:
+  на каждой итерации углубления ходы из корня распределяются между процессами,
+  каждый процесс ищет на своей копии Board, результаты сводятся в один лучший ход;
+- ParallelEngine.analyse - пакетный анализ: каждая позиция целиком ищется
+  в отдельном процессе, производительность растёт почти линейно с числом ядер.
+
+Запуск (сравнение с поиском в одном процессе):
+    python parallel.py --depth 4 --processes 8
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+
+from core import *
+from engine import INFINITY, MATE_SCORE, MAX_DEPTH, Engine, SearchResult, SearchStopped, in_check
+from transposition import TranspositionTable
+
+# Позиции для замера ускорения: ходы от начальной позиции в формате UCI
+BENCHMARK_POSITIONS = [
+    [],
+    ["e2e4", "e7e5", "g1f3", "b8c6", "f1b5", "a7a6"],
+    ["d2d4", "g8f6", "c2c4", "e7e6", "b1c3", "f8b4"],
+    ["e2e4", "c7c5", "g1f3", "d7d6", "d2d4", "c5d4", "f3d4", "g8f6", "b1c3", "a7a6"],
+    ["e2e4", "e7e6", "d2d4", "d7d5", "b1c3", "g8f6", "c1g5", "f8e7", "e4e5", "f6d7"],
+]
+
+_engine = None  # Движок процесса-исполнителя, создаётся один раз при запуске процесса
+_search_id = None  # Номер поиска ParallelEngine.search, к которому относилась последняя задача исполнителя
+
+
+def _init_worker(hash_mb):
+    """Инициализация процесса-исполнителя: свой движок и своя таблица транспозиций."""
+    global _engine
+    _engine = Engine(TranspositionTable(hash_mb) if hash_mb else None)
+
+
+def _search_move(task):
+    """Задача исполнителя: оценить ход move из позиции board поиском на глубину depth.
+    Ходы, которые не лучше alpha, получают оценку alpha.
+    deadline - момент окончания поиска по time.time() (общим для всех процессов часам).
+    search_id - номер поиска: с задачей нового поиска исполнитель забывает ходы-убийцы
+    и историю прошлой позиции и начинает новое поколение таблицы транспозиций.
+    Возвращает (оценка, главный вариант, число узлов) или None, если закончилось время."""
+    global _search_id
+    board, move, depth, alpha, deadline, search_id = task
+    if search_id != _search_id:
+        _search_id = search_id
+        _engine.ordering.new_search()
+        if _engine.tt is not None:
+            _engine.tt.new_search()
+    _engine.nodes = 0
+    _engine.node_limit = None
+    _engine.deadline = time.perf_counter() + deadline - time.time() if deadline is not None else None
+    _engine.can_stop = True
+
+    board.make_move(move)
+    try:
+        score, pv = _engine.negamax(board, depth - 1, -INFINITY, -alpha, 1, [])
+    except SearchStopped:
+        return None
+    return -score, [move] + pv, _engine.nodes
+
+
+def _search_position(task):
+    """Задача исполнителя: полный поиск в позиции board."""
+    board, depth, time_limit = task
+    return _engine.search(board, depth, time_limit)
+
+
+class ParallelEngine:
+    """Поиск хода на пуле процессов. Пул создаётся один раз и используется повторно;
+    после работы его нужно закрыть методом close или использовать объект в блоке with."""
+
+    def __init__(self, processes=None, hash_mb=16):
+        self.processes = processes or multiprocessing.cpu_count()
+        self.pool = multiprocessing.Pool(self.processes, initializer=_init_worker, initargs=(hash_mb,))
+        self.searches = 0  # Число вызовов search, номер поиска для задач исполнителей
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def search(self, board, max_depth=MAX_DEPTH, time_limit=None, callback=None):
+        """Ищет лучший ход для текущего игрока, распределяя ходы из корня между процессами.
+        Первая итерация всегда завершается; остальные прерываются по time_limit.
+        Возвращает SearchResult последней завершённой итерации."""
+        start = time.perf_counter()
+        moves = list(board.generate_legal_moves())
+        if not moves:
+            return SearchResult(None, -MATE_SCORE if in_check(board) else 0, 0, [], 0, 0.0)
+
+        result = SearchResult(moves[0], 0, 0, [moves[0]], 0, 0.0)
+        deadline = time.time() + time_limit if time_limit is not None else None
+        self.searches += 1
+        nodes = 0
+        for depth in range(1, max_depth + 1):
+            # Первая итерация не прерывается, чтобы всегда был ответ
+            task_deadline = deadline if depth > 1 else None
+            if task_deadline is not None and time.time() >= task_deadline:
+                break
+
+            # Лучший ход прошлой итерации ищется первым с полным окном: его оценка
+            # становится нижней границей для остальных ходов, которые ищутся параллельно
+            first = self.pool.apply(_search_move, ((board, moves[0], depth, -INFINITY, task_deadline, self.searches),))
+            if first is None:
+                break
+            rest = self.pool.map(_search_move, [(board, move, depth, first[0], task_deadline, self.searches)
+                                                for move in moves[1:]], chunksize=1)
+            if any(answer is None for answer in rest):
+                break
+
+            answers = [first] + rest
+            nodes += sum(answer[2] for answer in answers)
+            score, pv, _ = max(answers, key=lambda answer: answer[0])
+            result = SearchResult(pv[0], score, depth, pv, nodes, time.perf_counter() - start)
+            if callback is not None:
+                callback(result)
+
+            # Следующая итерация начинается с лучших ходов: они раньше попадут к исполнителям
+            moves = [answer[1][0] for answer in sorted(answers, key=lambda answer: -answer[0])]
+
+            if abs(score) >= MATE_SCORE - MAX_DEPTH:
+                break
+
+        return result._replace(nodes=nodes, time=time.perf_counter() - start)
+
+    def analyse(self, boards, depth=MAX_DEPTH, time_limit=None):
+        """Пакетный анализ: ищет лучший ход в каждой позиции из boards, по позиции на процесс.
+        Возвращает список SearchResult в порядке позиций."""
+        return self.pool.map(_search_position, [(board, depth, time_limit) for board in boards], chunksize=1)
+
+
+def benchmark_boards():
+    """Позиции BENCHMARK_POSITIONS в виде объектов Board."""
+    boards = []
+    for moves in BENCHMARK_POSITIONS:
+        board = Board()
+        for text in moves:
+            board.make_move(uci_to_move(text))
+        boards.append(board)
+    return boards
+
+
+def benchmark(depth, processes, hash_mb=16, output=sys.stdout):
+    """Сравнивает поиск на глубину depth в одном процессе с параллельным поиском
+    (разделение корня и пакетный анализ). Возвращает словарь с ускорениями."""
+    boards = benchmark_boards()
+
+    start = time.perf_counter()
+    serial_nodes = 0
+    for board in boards:
+        serial_nodes += Engine(TranspositionTable(hash_mb) if hash_mb else None).search(board, depth).nodes
+    serial_time = time.perf_counter() - start
+    print(f"1 процесс: {serial_time:.2f} с, {serial_nodes / serial_time:.0f} узлов/с", file=output)
+
+    with ParallelEngine(processes, hash_mb) as engine:
+        start = time.perf_counter()
+        split_nodes = sum(engine.search(board, depth).nodes for board in boards)
+        split_time = time.perf_counter() - start
+        print(f"{engine.processes} процессов, разделение корня: {split_time:.2f} с, "
+              f"{split_nodes / split_time:.0f} узлов/с, ускорение {serial_time / split_time:.2f}", file=output)
+
+        start = time.perf_counter()
+        batch_nodes = sum(result.nodes for result in engine.analyse(boards, depth))
+        batch_time = time.perf_counter() - start
+        print(f"{engine.processes} процессов, пакетный анализ: {batch_time:.2f} с, "
+              f"{batch_nodes / batch_time:.0f} узлов/с, ускорение {serial_time / batch_time:.2f}", file=output)
+
+    return {"root_split": serial_time / split_time, "batch": serial_time / batch_time}
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Параллельный поиск и замер ускорения")
+    parser.add_argument("--depth", type=int, default=3, help="глубина поиска")
+    parser.add_argument("--processes", type=int, default=None, help="число процессов (по умолчанию - число ядер)")
+    parser.add_argument("--hash", type=int, default=16, help="размер таблицы транспозиций процесса в МБ")
+    args = parser.parse_args(args)
+
+    benchmark(args.depth, args.processes, args.hash)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
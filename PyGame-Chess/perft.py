@@ -0,0 +1,142 @@
+"""Perft - подсчёт числа позиций, достижимых за заданное число ходов.
+
+Используется для проверки правил core.Board по эталонным позициям
+и для измерения скорости генерации ходов.
+
+Запуск:
+    python perft.py --depth 4                  # начальная позиция
+    python perft.py --fen "<FEN>" --depth 3 --divide
+    python perft.py --suite --max-nodes 500000 # проверка по эталонным позициям
+"""
+import argparse
+import sys
+import time
+
+from core import *
+
+# Эталонные позиции и число позиций для глубин 1, 2, 3, ...
+REFERENCE_POSITIONS = [
+    ("Начальная позиция",
+     "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+     (20, 400, 8902, 197281, 4865609)),
+    ("Kiwipete",
+     "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     (48, 2039, 97862, 4085603)),
+    ("Позиция 3",
+     "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     (14, 191, 2812, 43238, 674624)),
+    ("Позиция 4",
+     "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     (6, 264, 9467, 422333)),
+    ("Позиция 5",
+     "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     (44, 1486, 62379, 2103487)),
+    ("Позиция 6",
+     "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     (46, 2079, 89890, 3894594)),
+]
+
+
+def perft(board, depth):
+    """Возвращает число позиций, достижимых из позиции board ровно за depth полуходов."""
+    if depth <= 0:
+        return 1
+
+    moves = list(board.generate_legal_moves())
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        board.make_move(move)
+        nodes += perft(board, depth - 1)
+        board.unmake_move()
+    return nodes
+
+
+def divide(board, depth):
+    """Возвращает словарь: запись хода в формате UCI -> число позиций после этого хода на глубине depth."""
+    if depth < 1:
+        raise ValueError(f"Глубина должна быть не меньше 1: {depth}")
+    result = {}
+    for move in list(board.generate_legal_moves()):
+        board.make_move(move)
+        result[move_to_uci(move)] = perft(board, depth - 1)
+        board.unmake_move()
+    return result
+
+
+def run(board, max_depth):
+    """Считает perft для глубин от 1 до max_depth.
+    Возвращает список кортежей (глубина, число позиций, время в секундах, позиций в секунду)."""
+    results = []
+    for depth in range(1, max_depth + 1):
+        start = time.perf_counter()
+        nodes = perft(board, depth)
+        elapsed = time.perf_counter() - start
+        results.append((depth, nodes, elapsed, nodes / elapsed if elapsed else 0.0))
+    return results
+
+
+def run_suite(max_nodes, output=sys.stdout):
+    """Проверяет эталонные позиции на всех глубинах, где ожидаемое число позиций не больше max_nodes.
+    Возвращает True, если все значения совпали."""
+    passed = True
+    total_nodes = 0
+    total_time = 0.0
+
+    for name, fen, expected in REFERENCE_POSITIONS:
+        board = Board.from_fen(fen)
+        for depth, count in enumerate(expected, 1):
+            if count > max_nodes:
+                break
+            start = time.perf_counter()
+            nodes = perft(board, depth)
+            elapsed = time.perf_counter() - start
+            total_nodes += nodes
+            total_time += elapsed
+
+            status = "OK" if nodes == count else "ОШИБКА"
+            passed = passed and nodes == count
+            print(f"{name:<20} глубина {depth}: {nodes:>10} (ожидалось {count:>10}) "
+                  f"{elapsed:8.2f} с  {status}", file=output)
+
+    if total_time:
+        print(f"Всего позиций: {total_nodes}, {total_nodes / total_time:.0f} позиций/с", file=output)
+    return passed
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Perft для core.Board")
+    parser.add_argument("--fen", help="позиция в нотации FEN (по умолчанию - начальная)")
+    parser.add_argument("--depth", type=int, default=3, help="глубина перебора")
+    parser.add_argument("--divide", action="store_true", help="вывести число позиций после каждого хода")
+    parser.add_argument("--suite", action="store_true", help="проверить эталонные позиции")
+    parser.add_argument("--max-nodes", type=int, default=200000,
+                        help="для --suite: пропускать глубины с большим числом позиций")
+    args = parser.parse_args(args)
+    if args.depth < 1:
+        parser.error("глубина должна быть не меньше 1")
+
+    if args.suite:
+        return 0 if run_suite(args.max_nodes) else 1
+
+    board = Board.from_fen(args.fen) if args.fen else Board()
+
+    if args.divide:
+        start = time.perf_counter()
+        result = divide(board, args.depth)
+        elapsed = time.perf_counter() - start
+        for move, nodes in sorted(result.items()):
+            print(f"{move}: {nodes}")
+        total = sum(result.values())
+        print(f"\nХодов: {len(result)}, позиций: {total}, {total / elapsed if elapsed else 0:.0f} позиций/с")
+        return 0
+
+    for depth, nodes, elapsed, nps in run(board, args.depth):
+        print(f"глубина {depth}: {nodes:>10} позиций {elapsed:8.2f} с {nps:>10.0f} позиций/с")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
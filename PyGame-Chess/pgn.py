@@ -0,0 +1,224 @@
+"""Потоковое чтение партий в формате PGN и проверка их по правилам core.Board.
+
+Файл читается построчно, в памяти находится только текущая партия.
+Ходы в алгебраической нотации (SAN) сопоставляются с допустимыми ходами доски.
+Для каждой партии возвращается GameResult: все ли ходы допустимы,
+номер первого недопустимого полухода и итоговая позиция в нотации FEN.
+
+Большие файлы можно проверять на нескольких процессах: файл делится на куски
+по границам партий (строкам с тегом [Event ...]), каждый кусок проверяется отдельно.
+
+Запуск:
+    python pgn.py games.pgn
+    python pgn.py games.pgn --processes 8 --errors-only
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+
+from core import *
+
+# Партия: смещение начала в файле (в байтах), теги и ходы в нотации SAN
+PgnGame = namedtuple('PgnGame', ['offset', 'headers', 'moves'])
+
+# Результат проверки партии. illegal_ply - номер первого недопустимого полухода (с 1),
+# 0 при некорректном теге FEN или None, illegal_move - запись этого хода (или тега FEN),
+# fen - позиция после последнего допустимого хода
+GameResult = namedtuple('GameResult', ['offset', 'white', 'black', 'result', 'plies',
+                                       'legal', 'illegal_ply', 'illegal_move', 'fen'])
+
+TAG_RE = re.compile(r'^\[(\w+)\s+"(.*)"\]\s*$')
+TOKEN_RE = re.compile(r'\{[^}]*\}|;[^\n]*|\(|\)|\$\d+|[^\s(){};]+')
+MOVE_NUMBER_RE = re.compile(r'^\d+\.+')
+SAN_RE = re.compile(r'^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?[+#]?[!?]*$')
+CASTLING_RE = re.compile(r'^([O0]-[O0](-[O0])?)[+#]?[!?]*$')
+
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+SAN_KINDS = {'N': KNIGHT, 'B': BISHOP, 'R': ROOK, 'Q': QUEEN, 'K': KING}
+SAN_PROMOTIONS = {'N': Knight, 'B': Bishop, 'R': Rook, 'Q': Queen}
+
+SHARD_SIZE = 8 * 1024 * 1024  # Размер куска файла для одного процесса, байт
+
+
+def parse_movetext(text):
+    """Возвращает список ходов в нотации SAN из текста ходов партии.
+    Комментарии, варианты, номера ходов, NAG и результат партии пропускаются."""
+    moves = []
+    depth = 0  # Глубина вложенности вариантов
+    for token in TOKEN_RE.findall(text):
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth = max(depth - 1, 0)
+        elif depth or token[0] in '{;$' or token in RESULTS:
+            continue
+        else:
+            token = MOVE_NUMBER_RE.sub('', token)
+            if token:
+                moves.append(token)
+    return moves
+
+
+def read_games(stream, start=0, end=None):
+    """Генератор партий из бинарного потока stream.
+    Если заданы start и end, возвращаются только партии, которые начинаются в этом диапазоне байтов."""
+    offset = start
+    if start:
+        # Дочитываем строку, в которой находится start, и ищем начало следующей партии
+        stream.seek(start - 1)
+        offset = start - 1 + len(stream.readline())
+        for line in iter(stream.readline, b''):
+            if line.startswith(b'[Event '):
+                break
+            offset += len(line)
+    stream.seek(offset)
+
+    headers = {}
+    movetext = []
+    game_offset = None
+
+    for line in iter(stream.readline, b''):
+        line_offset = offset
+        offset += len(line)
+        text = line.decode('utf-8', errors='replace').strip()
+        if text.startswith('%'):
+            continue
+
+        tag = TAG_RE.match(text) if text.startswith('[') else None
+        if tag:
+            # Тег после текста ходов - начало следующей партии
+            if movetext:
+                yield PgnGame(game_offset, headers, parse_movetext('\n'.join(movetext)))
+                headers = {}
+                movetext = []
+                game_offset = None
+            if game_offset is None:
+                if end is not None and line_offset >= end:
+                    return
+                game_offset = line_offset
+            headers[tag.group(1)] = tag.group(2)
+        elif text:
+            if game_offset is None:
+                if end is not None and line_offset >= end:
+                    return
+                game_offset = line_offset
+            movetext.append(text)
+
+    if headers or movetext:
+        yield PgnGame(game_offset, headers, parse_movetext('\n'.join(movetext)))
+
+
+def san_to_move(board, san):
+    """Находит допустимый ход текущего игрока, записанный в нотации SAN.
+    Возвращает объект Move или None, если ход недопустим или неоднозначен."""
+    castling = CASTLING_RE.match(san)
+    if castling:
+        king = board.bitboards[board.color][KING]
+        if not king:
+            return None
+        row, col = divmod(king.bit_length() - 1, 8)
+        col1 = 2 if castling.group(2) else 6
+        for move in board.generate_legal_moves(origins=king):
+            if move.col1 == col1 and move.row1 == row and col == 4:
+                return move
+        return None
+
+    match = SAN_RE.match(san)
+    if not match:
+        return None
+    letter, file, rank, target, promotion = match.groups()
+    kind = SAN_KINDS[letter] if letter else PAWN
+    row1, col1 = int(target[1]) - 1, ord(target[0]) - ord('a')
+    figure = SAN_PROMOTIONS[promotion] if promotion else None
+
+    found = None
+    for move in board.generate_legal_moves(origins=board.bitboards[board.color][kind]):
+        if move.row1 != row1 or move.col1 != col1 or move.promotion is not figure:
+            continue
+        if file and move.col != ord(file) - ord('a') or rank and move.row != int(rank) - 1:
+            continue
+        if found is not None:
+            return None  # Ход неоднозначен
+        found = move
+    return found
+
+
+def replay(game):
+    """Проигрывает партию на доске и возвращает GameResult."""
+    headers = game.headers
+    try:
+        board = Board.from_fen(headers['FEN']) if 'FEN' in headers else Board()
+    except ValueError:
+        # Некорректная начальная позиция: партия недопустима с нулевого полухода
+        return GameResult(game.offset, headers.get('White', '?'), headers.get('Black', '?'),
+                          headers.get('Result', '*'), 0, False, 0, f"FEN: {headers['FEN']}", '')
+
+    illegal_ply = illegal_move = None
+    for ply, san in enumerate(game.moves, 1):
+        move = san_to_move(board, san)
+        if move is None:
+            illegal_ply, illegal_move = ply, san
+            break
+        board.make_move(move)
+
+    return GameResult(game.offset, headers.get('White', '?'), headers.get('Black', '?'),
+                      headers.get('Result', '*'), len(board.undo_stack), illegal_ply is None,
+                      illegal_ply, illegal_move, board.to_fen())
+
+
+def _validate_shard(task):
+    """Задача процесса: проверить партии, начинающиеся в куске файла [start, end)."""
+    path, start, end = task
+    with open(path, 'rb') as stream:
+        return [replay(game) for game in read_games(stream, start, end)]
+
+
+def validate(path, processes=1, shard_size=SHARD_SIZE):
+    """Генератор результатов проверки всех партий файла path в порядке их следования.
+    При processes > 1 куски файла размером shard_size проверяются параллельно;
+    в памяти одновременно находятся результаты не более чем нескольких кусков."""
+    if processes <= 1:
+        with open(path, 'rb') as stream:
+            for game in read_games(stream):
+                yield replay(game)
+        return
+
+    size = os.path.getsize(path)
+    shards = [(path, start, min(start + shard_size, size)) for start in range(0, size, shard_size)]
+    with multiprocessing.Pool(processes) as pool:
+        for results in pool.imap(_validate_shard, shards):
+            yield from results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Проверка партий из PGN-файла по правилам core.Board")
+    parser.add_argument("path", help="PGN-файл")
+    parser.add_argument("--processes", type=int, default=1, help="число процессов")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="размер куска файла в байтах")
+    parser.add_argument("--errors-only", action="store_true", help="выводить только партии с недопустимыми ходами")
+    args = parser.parse_args(args)
+
+    start = time.perf_counter()
+    games = illegal = plies = 0
+    for result in validate(args.path, args.processes, args.shard_size):
+        games += 1
+        plies += result.plies
+        if not result.legal:
+            illegal += 1
+        if not result.legal or not args.errors_only:
+            status = "OK" if result.legal else f"ОШИБКА: полуход {result.illegal_ply} '{result.illegal_move}'"
+            print(f"{result.offset}\t{result.white} - {result.black}\t{result.result}\t"
+                  f"{result.plies}\t{status}\t{result.fen}")
+
+    elapsed = time.perf_counter() - start
+    print(f"Партий: {games}, с ошибками: {illegal}, полуходов: {plies}, "
+          f"{elapsed:.2f} с, {plies / elapsed if elapsed else 0:.0f} полуходов/с", file=sys.stderr)
+    return 0 if not illegal else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
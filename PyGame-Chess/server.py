@@ -0,0 +1,304 @@
+"""Сервер партий на asyncio: много одновременных партий core.Board по строковому протоколу
+через TCP или Unix-сокет, а также генератор нагрузки для него.
+
+Протокол: одна команда в строке, слова разделяются пробелами. Ответ - одна строка,
+которая начинается с "ok" или "error". Команды:
+    new [FEN]         - создать партию, ответ: ok <id>
+    move <id> <ход>   - сделать ход в формате UCI, ответ: ok <FEN> <состояние>
+                        (состояние: check, mate, stalemate или -)
+    moves <id>        - допустимые ходы, ответ: ok <ход> <ход> ...
+    fen <id>          - позиция, ответ: ok <FEN>
+    watch <id>        - подписаться на ходы партии, после каждого хода приходит строка
+                        event <id> <ход> <FEN> <состояние>
+    close <id>        - удалить партию
+    stats             - ok games=<число партий> memory=<байт> moves=<сделано ходов>
+    memory <id>       - ok <байт, занятых партией>
+
+Запуск:
+    python server.py serve --port 7777
+    python server.py serve --unix /tmp/chess.sock
+    python server.py load --port 7777 --games 1000 --concurrency 200
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+from core import *
+
+STATUS_NAMES = {CHECK: "check", MATE: "mate", STALEMATE: "stalemate", None: "-"}
+
+WATCH_BUFFER_LIMIT = 1024 * 1024  # Наблюдатель отключается, если не успевает читать события, байт
+LINE_LIMIT = 4096  # Наибольшая длина строки команды
+SMALL_INT_MIN, SMALL_INT_MAX = -5, 256  # Числа, которые интерпретатор создаёт один раз и использует повторно
+
+
+def value_memory(value):
+    """Объём памяти значения из кортежей, словарей и чисел вместе с содержимым, в байтах.
+    Общие объекты (классы фигур в ходах, малые числа) не учитываются."""
+    if isinstance(value, tuple):
+        return sys.getsizeof(value) + sum(value_memory(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(value_memory(key) + value_memory(item) for key, item in value.items())
+    if isinstance(value, int) and not SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+        return sys.getsizeof(value)
+    return 0
+
+
+def board_memory(board):
+    """Примерный объём памяти, занятый доской board, в байтах (без общих объектов фигур и таблиц)."""
+    size = sys.getsizeof(board) + sys.getsizeof(board.__dict__)
+    size += sys.getsizeof(board.squares)
+    for color in (WHITE, BLACK):
+        size += sys.getsizeof(board.bitboards[color]) + sum(sys.getsizeof(mask) for mask in board.bitboards[color])
+    size += sys.getsizeof(board.bitboards) + sys.getsizeof(board.occupied) + sys.getsizeof(board.occupancy)
+    size += sys.getsizeof(board.hash)
+    size += sys.getsizeof(board.undo_stack) + sum(sys.getsizeof(record) for record in board.undo_stack)
+    # Кеши позиции: допустимые ходы (legal_moves) и шахи со связками (king_safety)
+    size += value_memory(board._legal_moves) + value_memory(board._king_safety)
+    if board._field_view is not None:
+        size += sys.getsizeof(board._field_view) + sum(sys.getsizeof(line) for line in board._field_view)
+    return size
+
+
+class ServerGame:
+    """Партия на сервере: доска и подписанные на неё соединения."""
+
+    def __init__(self, board):
+        self.board = board
+        self.watchers = set()
+        self.status = board.status()
+
+    def memory(self):
+        return board_memory(self.board) + sys.getsizeof(self) + sys.getsizeof(self.watchers)
+
+
+class GameServer:
+    """Сервер партий. Все партии хранятся в памяти процесса и обрабатываются в одном цикле событий:
+    ход - короткая синхронная операция, поэтому блокировки не нужны."""
+
+    def __init__(self, max_games=None):
+        self.games = {}
+        self.next_id = 1
+        self.max_games = max_games
+        self.moves = 0  # Всего сделано ходов
+
+    async def serve(self, host=None, port=None, path=None):
+        """Запустить сервер на TCP-порту port или Unix-сокете path и обслуживать клиентов."""
+        if path:
+            server = await asyncio.start_unix_server(self.handle, path, limit=LINE_LIMIT)
+        else:
+            server = await asyncio.start_server(self.handle, host, port, limit=LINE_LIMIT)
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        """Обработать соединение с клиентом."""
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Строка длиннее LINE_LIMIT
+                    writer.write("error слишком длинная строка\n".encode())
+                    break
+                if not line:
+                    break
+                writer.write((self.execute(line.decode(errors="replace").split(), writer) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for game in self.games.values():
+                game.watchers.discard(writer)
+            writer.close()
+
+    def execute(self, words, writer=None):
+        """Выполнить команду words (список слов) и вернуть строку ответа."""
+        if not words:
+            return "error пустая команда"
+        command, args = words[0].lower(), words[1:]
+        handler = getattr(self, "command_" + command, None)
+        if handler is None:
+            return f"error неизвестная команда '{command}'"
+        try:
+            return handler(args, writer)
+        except (ValueError, IndexError) as error:
+            return f"error {error}"
+
+    def get_game(self, args):
+        """Партия по номеру из первого аргумента команды."""
+        if not args:
+            raise ValueError("не указан номер партии")
+        game = self.games.get(args[0])
+        if game is None:
+            raise ValueError(f"партия '{args[0]}' не найдена")
+        return game
+
+    def command_new(self, args, writer):
+        if self.max_games is not None and len(self.games) >= self.max_games:
+            return "error превышено число партий"
+        board = Board.from_fen(" ".join(args)) if args else Board()
+        game_id = str(self.next_id)
+        self.next_id += 1
+        self.games[game_id] = ServerGame(board)
+        return "ok " + game_id
+
+    def command_move(self, args, writer):
+        game = self.get_game(args)
+        if len(args) < 2:
+            raise ValueError("не указан ход")
+        if game.status in (MATE, STALEMATE):
+            return "error партия окончена"
+
+        board = game.board
+        row, col, row1, col1, promotion = uci_to_move(args[1])
+        if board.try_promote_pawn(row, col, row1, col1):
+            if promotion is None:
+                return "error не указана фигура превращения"
+            board.move_and_promote_pawn(row, col, row1, col1, promotion)
+        elif promotion is None and board.try_move(row, col, row1, col1):
+            board.move_piece(row, col, row1, col1)
+        else:
+            return f"error недопустимый ход '{args[1]}'"
+
+        self.moves += 1
+        game.status = board.status()
+        result = f"{board.to_fen()} {STATUS_NAMES[game.status]}"
+        self.notify(args[0], game, f"event {args[0]} {args[1].lower()} {result}\n".encode())
+        return "ok " + result
+
+    def notify(self, game_id, game, line):
+        """Разослать строку line наблюдателям партии. Отстающие наблюдатели отключаются."""
+        for watcher in list(game.watchers):
+            if watcher.is_closing() or watcher.transport.get_write_buffer_size() > WATCH_BUFFER_LIMIT:
+                game.watchers.discard(watcher)
+                continue
+            watcher.write(line)
+
+    def command_moves(self, args, writer):
+        board = self.get_game(args).board
+        return " ".join(["ok"] + [move_to_uci(move) for move in board.legal_moves()])
+
+    def command_fen(self, args, writer):
+        return "ok " + self.get_game(args).board.to_fen()
+
+    def command_watch(self, args, writer):
+        game = self.get_game(args)
+        if writer is not None:
+            game.watchers.add(writer)
+        return "ok"
+
+    def command_close(self, args, writer):
+        self.get_game(args)
+        del self.games[args[0]]
+        return "ok"
+
+    def command_memory(self, args, writer):
+        return f"ok {self.get_game(args).memory()}"
+
+    def command_stats(self, args, writer):
+        memory = sum(game.memory() for game in self.games.values())
+        return f"ok games={len(self.games)} memory={memory} moves={self.moves}"
+
+
+async def _request(reader, writer, line):
+    """Отправить команду и дождаться ответа, пропуская события наблюдения."""
+    writer.write(line.encode() + b"\n")
+    await writer.drain()
+    while True:
+        answer = (await reader.readline()).decode().strip()
+        if not answer:
+            raise ConnectionError("соединение закрыто сервером")
+        if not answer.startswith("event "):
+            return answer
+
+
+async def _play(host, port, path, games, max_plies, latencies, counters, seed):
+    """Клиент генератора нагрузки: по очереди играет games партий случайными ходами."""
+    if path:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    generator = random.Random(seed)
+    try:
+        for _ in range(games):
+            game_id = (await _request(reader, writer, "new")).split()[1]
+            for _ in range(max_plies):
+                moves = (await _request(reader, writer, "moves " + game_id)).split()[1:]
+                if not moves:
+                    break
+                start = time.perf_counter()
+                answer = await _request(reader, writer, f"move {game_id} {generator.choice(moves)}")
+                latencies.append(time.perf_counter() - start)
+                if not answer.startswith("ok"):
+                    counters["errors"] += 1
+                    break
+                counters["moves"] += 1
+            await _request(reader, writer, "close " + game_id)
+    finally:
+        writer.close()
+
+
+def percentile(values, fraction):
+    """Значение, меньше которого доля fraction отсортированных значений values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run_load(host=None, port=None, path=None, games=1000, concurrency=100, max_plies=80, output=sys.stdout):
+    """Генератор нагрузки: concurrency соединений играют всего games партий.
+    Печатает число ходов в секунду и задержки ответа на ход. Возвращает словарь с результатами."""
+    latencies = []
+    counters = {"moves": 0, "errors": 0}
+    per_client = [games // concurrency + (1 if i < games % concurrency else 0) for i in range(concurrency)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_play(host, port, path, count, max_plies, latencies, counters, i)
+                           for i, count in enumerate(per_client) if count))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    result = {
+        "moves": counters["moves"],
+        "errors": counters["errors"],
+        "moves_per_second": counters["moves"] / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99)
+    }
+    print(f"Партий: {games}, ходов: {result['moves']}, ошибок: {result['errors']}, {elapsed:.2f} с, "
+          f"{result['moves_per_second']:.0f} ходов/с, задержка хода p50 {result['p50'] * 1000:.2f} мс, "
+          f"p99 {result['p99'] * 1000:.2f} мс", file=output)
+    return result
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Сервер партий и генератор нагрузки")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+    for name, help_text in (("serve", "запустить сервер"), ("load", "запустить генератор нагрузки")):
+        subparser = subparsers.add_parser(name, help=help_text)
+        subparser.add_argument("--host", default="127.0.0.1", help="адрес TCP")
+        subparser.add_argument("--port", type=int, default=7777, help="порт TCP")
+        subparser.add_argument("--unix", help="путь к Unix-сокету (вместо TCP)")
+    subparsers.choices["serve"].add_argument("--max-games", type=int, default=None, help="наибольшее число партий")
+    load = subparsers.choices["load"]
+    load.add_argument("--games", type=int, default=1000, help="число партий")
+    load.add_argument("--concurrency", type=int, default=100, help="число одновременных соединений")
+    load.add_argument("--plies", type=int, default=80, help="наибольшее число полуходов в партии")
+    args = parser.parse_args(args)
+
+    if args.mode == "serve":
+        try:
+            asyncio.run(GameServer(args.max_games).serve(args.host, args.port, args.unix))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    result = asyncio.run(run_load(args.host, args.port, args.unix, args.games, args.concurrency, args.plies))
+    return 0 if not result["errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
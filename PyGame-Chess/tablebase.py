@@ -0,0 +1,460 @@
+"""Таблицы эндшпилей для малого числа фигур (KQK, KRK, KPK и т.п.): построение ретроградным анализом
+и чтение через mmap.
+
+Набор фигур задаётся строкой: сначала фигуры белых, затем чёрных, каждая сторона начинается
+с короля (KQK - король и ферзь против короля, KRKP - король и ладья против короля и пешки).
+Фигуры стороны приводятся к порядку KQRBNP, поэтому KNQK и KQNK - один и тот же набор.
+Позиции с тем же набором фигур, но с другими цветами, читаются из той же таблицы с отражением доски.
+
+Таблица - файл <набор>.tbl, по байту на позицию. Номер позиции вычисляется без поиска:
+    очередь хода (0 - белые, 1 - чёрные), затем номера клеток фигур (по 6 бит) в порядке набора,
+одинаковые фигуры одного цвета записываются по возрастанию клеток. Значение байта:
+    0 - ничья, 1..254 - число полуходов до мата плюс 1 (нечётное число полуходов - выигрыш
+    игрока, который делает ход, чётное - проигрыш), 255 - невозможная позиция.
+Права на рокировку не учитываются, взятие на проходе - тоже (в позициях, где оно возможно,
+таблицы не используются).
+
+Ходы берутся из core.Board, поэтому таблицы строятся по тем же правилам, что и игра.
+Ходы всех позиций перебираются на нескольких процессах, затем значения распространяются
+от матов и патов к предшествующим позициям. Таблицы, в которые ведут взятия и превращения
+(для KPK - KQK и KRK), строятся заранее.
+
+Запуск:
+    python tablebase.py generate KQK KRK KPK --processes 8
+    python tablebase.py probe --fen "8/8/8/4k3/8/8/8/KQ6 w - - 0 1"
+"""
+import argparse
+import mmap
+import multiprocessing
+import os
+import sys
+import time
+from array import array
+
+from core import *
+
+# Результат с точки зрения игрока, который делает ход
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+INVALID = 255  # Значение невозможной позиции
+MAX_DISTANCE = 253  # Наибольшее число полуходов до мата, которое помещается в байт
+NO_DISTANCE = 255  # В массивах построения: расстояние не найдено
+
+DEFAULT_DIRECTORY = "tablebases"
+CHUNK_SIZE = 16384  # Позиций в одной задаче процесса
+
+# Буквы фигур в наборе в порядке записи
+MATERIAL_LETTERS = (('K', KING), ('Q', QUEEN), ('R', ROOK), ('B', BISHOP), ('N', KNIGHT), ('P', PAWN))
+MATERIAL_KINDS = dict(MATERIAL_LETTERS)
+MATERIAL_ORDER = ''.join(letter for letter, kind in MATERIAL_LETTERS)
+
+# Состояние позиции после перебора ходов
+UNKNOWN = 0
+IMPOSSIBLE = 1
+MATED = 2
+STALEMATED = 3
+
+
+def canonical_name(name):
+    """Запись набора name, в которой фигуры каждой стороны идут в порядке KQRBNP (KNQK -> KQNK)."""
+    name = name.upper()
+    if name.count('K') != 2 or not name.startswith('K') or any(letter not in MATERIAL_KINDS for letter in name):
+        raise ValueError(f"Некорректный набор фигур: '{name}'")
+    black = name.index('K', 1)
+    return ''.join('K' + ''.join(sorted(side[1:], key=MATERIAL_ORDER.index))
+                   for side in (name[:black], name[black:]))
+
+
+def parse_material(name):
+    """Список (цвет, вид) фигур набора name в порядке записи."""
+    name = canonical_name(name)
+    black = name.index('K', 1)
+    return [(WHITE if i < black else BLACK, MATERIAL_KINDS[letter]) for i, letter in enumerate(name)]
+
+
+def side_material(board, color):
+    """Фигуры игрока color в записи набора (например, KQ)."""
+    pieces = board.bitboards[color]
+    return ''.join(letter * bin(pieces[kind]).count('1') for letter, kind in MATERIAL_LETTERS)
+
+
+def insufficient_material(name):
+    """Проверяет, что в наборе name мат невозможен: кроме королей не больше одного коня или слона."""
+    others = name.upper().replace('K', '')
+    return not others.strip('BN') and len(others) <= 1
+
+
+def table_size(pieces):
+    return 2 << 6 * len(pieces)
+
+
+def decode_value(value):
+    """(результат, число полуходов до мата или None) по байту таблицы; None для невозможной позиции."""
+    if value == INVALID:
+        return None
+    if value == 0:
+        return DRAW, None
+    return (WIN if value % 2 == 0 else LOSS), value - 1
+
+
+class Indexer:
+    """Вычисление номера позиции в таблице набора pieces."""
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+        # Группы одинаковых фигур (номера в наборе), клетки которых записываются по возрастанию
+        self.groups = []
+        for piece in set(pieces):
+            slots = [i for i, other in enumerate(pieces) if other == piece]
+            if len(slots) > 1:
+                self.groups.append(slots)
+
+    def index(self, side, squares):
+        """Номер позиции: ход игрока side (0 - белые, 1 - чёрные), фигуры в клетках squares."""
+        if self.groups:
+            squares = list(squares)
+            for slots in self.groups:
+                for slot, sq in zip(slots, sorted(squares[slot] for slot in slots)):
+                    squares[slot] = sq
+        index = side
+        for sq in squares:
+            index = index << 6 | sq
+        return index
+
+    def squares(self, index):
+        """Очередь хода и клетки фигур по номеру позиции."""
+        squares = []
+        for _ in self.pieces:
+            squares.append(index & 63)
+            index >>= 6
+        squares.reverse()
+        return index, squares
+
+    def canonical(self, squares):
+        """Проверяет, что одинаковые фигуры записаны по возрастанию клеток."""
+        return all(squares[a] < squares[b] for slots in self.groups for a, b in zip(slots, slots[1:]))
+
+    def board_index(self, board, flip):
+        """Номер позиции доски board; при flip доска отражается сверху вниз с заменой цветов."""
+        squares = []
+        taken = {}
+        for color, kind in self.pieces:
+            if flip:
+                color = opponent(color)
+            mask = board.bitboards[color][kind]
+            # Клетки одинаковых фигур раздаются по порядку, index затем их упорядочит
+            mask &= ~taken.get((color, kind), 0)
+            bit = mask & -mask
+            taken[color, kind] = taken.get((color, kind), 0) | bit
+            sq = bit.bit_length() - 1
+            squares.append(sq ^ 56 if flip else sq)
+        side = (board.color == BLACK) != flip
+        return self.index(int(side), squares)
+
+
+class Tablebase:
+    """Таблица набора name из каталога directory, отображённая в память."""
+
+    def __init__(self, name, directory=DEFAULT_DIRECTORY):
+        self.name = canonical_name(name)
+        self.indexer = Indexer(parse_material(self.name))
+        self.file = open(table_path(self.name, directory), 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        if size != table_size(self.indexer.pieces):
+            self.file.close()
+            raise ValueError(f"Размер таблицы {self.name} не совпадает с ожидаемым")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def probe_index(self, index):
+        return decode_value(self.data[index])
+
+    def probe(self, board, flip=False):
+        """(результат, полуходов до мата) для доски board с набором фигур этой таблицы."""
+        return self.probe_index(self.indexer.board_index(board, flip))
+
+
+class Tablebases:
+    """Все таблицы каталога directory. Таблицы открываются при первом обращении."""
+
+    def __init__(self, directory=DEFAULT_DIRECTORY):
+        self.directory = directory
+        self.tables = {}
+        self.max_pieces = 2
+        if os.path.isdir(directory):
+            for file_name in os.listdir(directory):
+                name, extension = os.path.splitext(file_name)
+                if extension == '.tbl':
+                    self.max_pieces = max(self.max_pieces, len(name))
+
+    def close(self):
+        for table in self.tables.values():
+            if table is not None:
+                table.close()
+        self.tables = {}
+
+    def table(self, name):
+        """Таблица набора name или None, если её нет."""
+        if name not in self.tables:
+            self.tables[name] = Tablebase(name, self.directory) \
+                if os.path.exists(table_path(name, self.directory)) else None
+        return self.tables[name]
+
+    def probe(self, board):
+        """(результат, полуходов до мата или None) для игрока, который делает ход, или None,
+        если таблицы для позиции нет."""
+        if board.castling or bin(board.occupancy).count('1') > self.max_pieces:
+            return None
+        white, black = side_material(board, WHITE), side_material(board, BLACK)
+        if board.en_passant is not None and 'P' in white and 'P' in black:
+            return None
+        if insufficient_material(white + black):
+            return DRAW, None
+        table = self.table(white + black)
+        if table is not None:
+            return table.probe(board)
+        table = self.table(black + white)
+        if table is not None:
+            return table.probe(board, flip=True)
+        return None
+
+
+def table_path(name, directory=DEFAULT_DIRECTORY):
+    return os.path.join(directory, name.upper() + '.tbl')
+
+
+def dependencies(name):
+    """Наборы, в которые позиция набора name переходит после взятия или превращения
+    (без наборов с недостаточным для мата материалом)."""
+    name = canonical_name(name)
+    white, black = name[:name.index('K', 1)], name[name.index('K', 1):]
+    result = set()
+    for side, other, first in ((white, black, True), (black, white, False)):
+        for i, letter in enumerate(side):
+            if letter == 'K':
+                continue
+            # Взятие фигуры
+            rest = side[:i] + side[i + 1:]
+            result.add(rest + other if first else other + rest)
+            # Превращение пешки
+            if letter == 'P':
+                for figure in 'QRBN':
+                    promoted = 'K' + ''.join(sorted(side[1:i] + figure + side[i + 1:], key=MATERIAL_ORDER.index))
+                    result.add(promoted + other if first else other + promoted)
+    return sorted(item for item in result if not insufficient_material(item))
+
+
+_tables = None  # Таблицы процесса-исполнителя
+
+
+def _init_worker(directory):
+    global _tables
+    _tables = Tablebases(directory)
+
+
+def _analyse_chunk(task):
+    """Задача процесса: перебрать ходы позиций [start, end) набора name.
+    Для каждой позиции возвращает состояние, позиции того же набора после каждого хода
+    и итог ходов, которые меняют набор фигур (взятий и превращений)."""
+    name, start, end = task
+    indexer = Indexer(parse_material(name))
+    pieces = indexer.pieces
+    board = Board.__new__(Board)
+    board.clear()
+
+    states = array('B')
+    counts = array('B')  # Число ходов в позиции того же набора
+    children = array('I')
+    draws = array('B')  # Число ходов, которые меняют набор и ведут к ничьей
+    wins = array('B')  # Наименьшее расстояние до мата через ход, который меняет набор (NO_DISTANCE - нет)
+    losses = array('B')  # Наибольшее расстояние до мата соперником через такие ходы (0 - нет)
+
+    placed = []
+    for index in range(start, end):
+        for sq in placed:
+            board.remove_code(sq)
+        placed = []
+        side, squares = indexer.squares(index)
+        color = BLACK if side else WHITE
+        state, count, draw, win, loss = UNKNOWN, 0, 0, NO_DISTANCE, 0
+
+        if len(set(squares)) != len(squares) or not indexer.canonical(squares) or \
+                any(kind == PAWN and sq // 8 in (0, 7) for (piece_color, kind), sq in zip(pieces, squares)):
+            state = IMPOSSIBLE
+        else:
+            for (piece_color, kind), sq in zip(pieces, squares):
+                board.put_code(sq, piece_color << 3 | kind)
+                placed.append(sq)
+            board.color = color
+            # Король игрока, который не делает ход, не может быть под шахом
+            if board.attackers_to(board.bitboards[opponent(color)][KING].bit_length() - 1, color, board.occupancy):
+                state = IMPOSSIBLE
+
+        if state == UNKNOWN:
+            moves = board.legal_moves()
+            if not moves:
+                state = MATED if board.in_check() else STALEMATED
+            slots = {sq: slot for slot, sq in enumerate(squares)}
+            for move in moves:
+                sq, sq1 = square(move.row, move.col), square(move.row1, move.col1)
+                if not board.squares[sq1] and move.promotion is None:
+                    child = list(squares)
+                    child[slots[sq]] = sq1
+                    children.append(indexer.index(1 - side, child))
+                    count += 1
+                    continue
+                board.make_move(move)
+                probed = _tables.probe(board)
+                if probed is None:
+                    raise ValueError(f"Нет таблицы для позиции {board.to_fen()} после хода из набора {name}")
+                board.unmake_move()
+                result, distance = probed
+                if result == DRAW:
+                    draw += 1
+                elif result == LOSS:
+                    win = min(win, distance + 1)
+                else:
+                    loss = max(loss, distance + 1)
+
+        states.append(state)
+        counts.append(count)
+        draws.append(draw)
+        wins.append(win)
+        losses.append(loss)
+    for sq in placed:
+        board.remove_code(sq)
+    return states, counts, children, draws, wins, losses
+
+
+def retrograde(size, states, counts, children, draws, wins, losses):
+    """Распространяет результаты от конечных позиций к предшествующим.
+    Возвращает массив байтов таблицы."""
+    # Предшествующие позиции каждой позиции в одном массиве
+    starts = array('I', bytes(4 * (size + 1)))
+    for child in children:
+        starts[child + 1] += 1
+    for index in range(size):
+        starts[index + 1] += starts[index]
+    fill = starts[:-1]
+    parents = array('I', bytes(4 * len(children)))
+    offset = 0
+    for index in range(size):
+        for child in children[offset:offset + counts[index]]:
+            parents[fill[child]] = index
+            fill[child] += 1
+        offset += counts[index]
+
+    # remaining - ходы, после которых соперник ещё не выигрывает; когда их не остаётся, позиция проиграна
+    remaining = array('H', (count + draw + (win != NO_DISTANCE) for count, draw, win in zip(counts, draws, wins)))
+    buckets = [[] for _ in range(MAX_DISTANCE + 2)]  # Позиции по расстоянию до мата
+    for index in range(size):
+        if states[index] == MATED:
+            buckets[0].append(index)
+        elif states[index] == UNKNOWN:
+            if wins[index] != NO_DISTANCE:
+                buckets[wins[index]].append(index)
+            if not remaining[index] and losses[index]:
+                buckets[losses[index]].append(index)
+
+    values = bytearray(size)
+    for index in range(size):
+        if states[index] == IMPOSSIBLE:
+            values[index] = INVALID
+    distances = losses  # Наибольшее расстояние до мата соперником по уже известным ходам
+
+    for distance, bucket in enumerate(buckets):
+        for index in bucket:
+            if values[index]:
+                continue
+            if distance > MAX_DISTANCE:
+                raise ValueError("Расстояние до мата не помещается в таблицу")
+            values[index] = distance + 1
+            for parent in parents[starts[index]:starts[index + 1]]:
+                if values[parent]:
+                    continue
+                if distance % 2 == 0:
+                    # Позиция проиграна - ход в неё выигрывает
+                    buckets[distance + 1].append(parent)
+                else:
+                    distances[parent] = max(distances[parent], distance + 1)
+                    remaining[parent] -= 1
+                    if not remaining[parent]:
+                        buckets[distances[parent]].append(parent)
+    return values
+
+
+def generate(name, directory=DEFAULT_DIRECTORY, processes=1, chunk_size=CHUNK_SIZE, output=sys.stdout):
+    """Построить таблицу набора name (и недостающие таблицы, в которые она переходит) в каталоге directory."""
+    name = canonical_name(name)
+    pieces = parse_material(name)
+    os.makedirs(directory, exist_ok=True)
+    for other in dependencies(name):
+        if not os.path.exists(table_path(other, directory)):
+            generate(other, directory, processes, chunk_size, output)
+    missing = [other for other in dependencies(name) if not os.path.exists(table_path(other, directory))]
+    if missing:
+        raise ValueError(f"Для набора {name} нет таблиц: {', '.join(missing)}")
+
+    start = time.perf_counter()
+    size = table_size(pieces)
+    tasks = [(name, first, min(first + chunk_size, size)) for first in range(0, size, chunk_size)]
+    parts = [array('B'), array('B'), array('I'), array('B'), array('B'), array('B')]
+    if processes > 1:
+        with multiprocessing.Pool(processes, _init_worker, (directory,)) as pool:
+            for result in pool.imap(_analyse_chunk, tasks):
+                for part, values in zip(parts, result):
+                    part.extend(values)
+    else:
+        _init_worker(directory)
+        for task in tasks:
+            for part, values in zip(parts, _analyse_chunk(task)):
+                part.extend(values)
+    analysed = time.perf_counter() - start
+
+    values = retrograde(size, *parts)
+    with open(table_path(name, directory), 'wb') as file:
+        file.write(values)
+
+    wins = sum(1 for value in values if value != INVALID and value and value % 2 == 0)
+    draws = values.count(0)
+    longest = max((value - 1 for value in values if value != INVALID and value % 2 == 0 and value), default=0)
+    print(f"{name}: позиций {size - values.count(INVALID)}, выигрышей {wins}, ничьих {draws}, "
+          f"самый долгий мат {longest} полуходов, ходы {analysed:.1f} с, "
+          f"всего {time.perf_counter() - start:.1f} с", file=output)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Таблицы эндшпилей: построение и чтение")
+    parser.add_argument("--directory", default=DEFAULT_DIRECTORY, help="каталог таблиц")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+    generate_parser = subparsers.add_parser("generate", help="построить таблицы")
+    generate_parser.add_argument("names", nargs="+", help="наборы фигур, например KQK KRK KPK")
+    generate_parser.add_argument("--processes", type=int, default=os.cpu_count(), help="число процессов")
+    probe = subparsers.add_parser("probe", help="результат позиции по таблицам")
+    probe.add_argument("--fen", required=True, help="позиция в нотации FEN")
+    args = parser.parse_args(args)
+
+    if args.mode == "generate":
+        for name in args.names:
+            generate(name, args.directory, args.processes)
+        return 0
+
+    tablebases = Tablebases(args.directory)
+    result = tablebases.probe(Board.from_fen(args.fen))
+    tablebases.close()
+    if result is None:
+        print("Позиции нет в таблицах")
+        return 1
+    outcome, distance = result
+    print({WIN: "выигрыш", DRAW: "ничья", LOSS: "проигрыш"}[outcome] +
+          (f", мат через {distance} полуходов" if distance is not None else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Проверки дебютной книги: ключи Polyglot и запись и чтение книг обоих форматов.
+
+Запуск:
+    python -m unittest test_book
+"""
+import os
+import tempfile
+import unittest
+
+from book import *
+
+# Ключи позиций из описания формата Polyglot: ходы от начальной позиции -> ключ
+POLYGLOT_KEYS = [
+    ((), 0x463B96181691FC9C),
+    (('e2e4',), 0x823C9B50FD114196),
+    (('e2e4', 'd7d5'), 0x0756B94461C50FB0),
+    (('e2e4', 'd7d5', 'e4e5'), 0x662FAFB965DB29D4),
+    (('e2e4', 'd7d5', 'e4e5', 'f7f5'), 0x22A48B5A8E47FF78),
+    (('e2e4', 'd7d5', 'e4e5', 'f7f5', 'e1e2'), 0x652A607CA3F242C1),
+    (('e2e4', 'd7d5', 'e4e5', 'f7f5', 'e1e2', 'e8f7'), 0x00FDD303C946BDD9),
+    (('a2a4', 'b7b5', 'h2h4', 'b5b4', 'c2c4'), 0x3C8123EA7B067637),
+    (('a2a4', 'b7b5', 'h2h4', 'b5b4', 'c2c4', 'b4c3', 'a1a3'), 0x5C3F9B829B279560),
+]
+
+PGN = b"""[Event "1"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 Nc6 3. Bc4 Bc5 4. O-O Nf6 1-0
+
+[Event "2"]
+[Result "1/2-1/2"]
+
+1. e4 c5 2. Nf3 d6 1/2-1/2
+"""
+
+
+def play(moves):
+    board = Board()
+    for text in moves:
+        board.make_move(uci_to_move(text))
+    return board
+
+
+class PolyglotKeyTest(unittest.TestCase):
+    def test_reference_keys(self):
+        for moves, key in POLYGLOT_KEYS:
+            with self.subTest(moves=moves):
+                self.assertEqual(polyglot_key(play(moves)), key)
+
+
+class BookTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pgn = os.path.join(self.directory.name, "games.pgn")
+        with open(self.pgn, 'wb') as stream:
+            stream.write(PGN)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        for layout in (NATIVE, POLYGLOT):
+            with self.subTest(layout=layout):
+                path = os.path.join(self.directory.name, layout + ".bin")
+                build_book([self.pgn], path, layout)
+                with OpeningBook(path, layout) as book:
+                    moves = {move_to_uci(item.move): item.weight for item in book.moves(Board())}
+                    self.assertEqual(moves, {'e2e4': 3})
+                    # Ходы проигравшей стороны получают нулевой вес и в книгу не попадают
+                    moves = [move_to_uci(item.move) for item in book.moves(play(('e2e4',)))]
+                    self.assertEqual(moves, ['c7c5'])
+                    # Рокировка записывается в формате Polyglot ходом короля на клетку ладьи
+                    board = play(('e2e4', 'e7e5', 'g1f3', 'b8c6', 'f1c4', 'f8c5'))
+                    self.assertEqual([move_to_uci(item.move) for item in book.moves(board)], ['e1g1'])
+
+    def test_polyglot_entry(self):
+        path = os.path.join(self.directory.name, "polyglot.bin")
+        build_book([self.pgn], path, POLYGLOT)
+        with OpeningBook(path, POLYGLOT) as book:
+            key, move, weight, learn = book.entry.unpack_from(book.data, 0)
+            self.assertEqual(book.entry.size, 16)
+            self.assertEqual(key, book.key_at(0))
+            self.assertEqual(learn, 0)
+        board = play(('e2e4', 'e7e5', 'g1f3', 'b8c6', 'f1c4', 'f8c5'))
+        # e1h1: из e1 (0, 4) в h1 (0, 7)
+        self.assertEqual(encode_move(uci_to_move('e1g1'), POLYGLOT, board), 7 | 4 << 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
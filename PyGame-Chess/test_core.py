@@ -0,0 +1,119 @@
+"""Проверки core.Board: запись FEN, ключ позиции и отмена ходов.
+
+Запуск:
+    python -m unittest test_core
+"""
+import random
+import unittest
+
+from core import *
+from perft import REFERENCE_POSITIONS
+
+FENS = [fen for name, fen, counts in REFERENCE_POSITIONS] + [
+    "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+    "8/8/8/8/k2Pp3/8/8/4K3 b - d3 0 1",
+    "4k3/8/8/8/8/8/8/4K2R w K - 12 40",
+]
+
+BAD_FENS = [
+    "",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP w KQkq - 0 1",  # Семь горизонталей
+    "rnbqkbnr/pppppppp/8/8/44/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",  # Цифры подряд
+    "rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",  # Девять клеток
+    "rnbqkbnr/pppppppp/7/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",  # Семь клеток
+    "rnbqkbnr/pppppppx/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",  # Неизвестная фигура
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1",  # Неизвестный цвет
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq e4 0 1",  # Взятие на проходе не на 3/6 горизонтали
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq i6 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq e33 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - x 1",  # Счётчики ходов
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 0",  # Ходы нумеруются с 1
+    "4k3/8/8/8/8/8/3PP3/4K3 w - e3 0 1",  # Клетка взятия на проходе не на стороне соперника
+    "4k3/8/8/8/8/4P3/8/4K3 b - e6 0 1",
+    "4k3/8/8/8/8/8/8/4K3 w - e6 0 1",  # Нет пешки соперника за клеткой взятия на проходе
+    "4k3/8/8/4P3/8/8/8/4K3 w - e6 0 1",  # За клеткой стоит своя пешка
+]
+
+
+def board_state(board):
+    """Всё состояние доски, которое должно восстанавливаться при отмене хода."""
+    return (bytes(board.squares), {color: board.bitboards[color][:] for color in (WHITE, BLACK)},
+            dict(board.occupied), board.occupancy, board.color, board.castling, board.en_passant,
+            board.halfmove_clock, board.fullmove_number, board.hash,
+            board.material, board.placement, board.phase)
+
+
+def random_games(count, plies, seed=0):
+    """Доски после случайных партий из позиций FENS."""
+    generator = random.Random(seed)
+    for fen in FENS:
+        for _ in range(count):
+            board = Board.from_fen(fen)
+            for _ in range(plies):
+                moves = board.legal_moves()
+                if not moves:
+                    break
+                board.make_move(generator.choice(moves))
+                yield board
+
+
+class FenTest(unittest.TestCase):
+    def test_round_trip(self):
+        for fen in FENS:
+            self.assertEqual(Board.from_fen(fen).to_fen(), fen)
+
+    def test_start_position(self):
+        self.assertEqual(Board().to_fen(), REFERENCE_POSITIONS[0][1])
+
+    def test_round_trip_after_moves(self):
+        for board in random_games(3, 40):
+            fen = board.to_fen()
+            self.assertEqual(Board.from_fen(fen).to_fen(), fen)
+
+    def test_malformed(self):
+        for fen in BAD_FENS:
+            with self.subTest(fen=fen):
+                with self.assertRaises(ValueError):
+                    Board.from_fen(fen)
+
+
+class HashTest(unittest.TestCase):
+    def test_incremental_hash(self):
+        """Ключ после ходов совпадает с ключом той же позиции, построенной заново."""
+        for board in random_games(5, 60):
+            self.assertEqual(board.hash, Board.from_fen(board.to_fen()).hash, board.to_fen())
+
+    def test_side_to_move(self):
+        white = Board.from_fen("4k3/8/8/8/8/8/8/4K3 w - - 0 1")
+        black = Board.from_fen("4k3/8/8/8/8/8/8/4K3 b - - 0 1")
+        self.assertNotEqual(white.hash, black.hash)
+
+
+class UndoTest(unittest.TestCase):
+    def test_unmake_restores_state(self):
+        generator = random.Random(1)
+        for fen in FENS:
+            board = Board.from_fen(fen)
+            states = []
+            for _ in range(60):
+                moves = board.legal_moves()
+                if not moves:
+                    break
+                states.append(board_state(board))
+                board.make_move(generator.choice(moves))
+            while states:
+                board.unmake_move()
+                self.assertEqual(board_state(board), states.pop())
+
+    def test_unmake_every_move(self):
+        for fen in FENS:
+            board = Board.from_fen(fen)
+            state = board_state(board)
+            for move in board.legal_moves():
+                board.make_move(move)
+                board.unmake_move()
+                self.assertEqual(board_state(board), state, move_to_uci(move))
+
+
+if __name__ == "__main__":
+    unittest.main()
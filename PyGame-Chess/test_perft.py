@@ -0,0 +1,30 @@
+"""Проверка правил core.Board по эталонным позициям perft.
+
+Запуск:
+    python -m unittest test_perft
+"""
+import io
+import unittest
+
+from core import *
+from perft import REFERENCE_POSITIONS, divide, perft, run_suite
+
+MAX_NODES = 10000  # Глубины с большим числом позиций пропускаются, чтобы проверка шла быстро
+
+
+class PerftTest(unittest.TestCase):
+    def test_reference_positions(self):
+        output = io.StringIO()
+        self.assertTrue(run_suite(MAX_NODES, output), output.getvalue())
+
+    def test_divide_matches_perft(self):
+        name, fen, expected = REFERENCE_POSITIONS[1]
+        board = Board.from_fen(fen)
+        self.assertEqual(sum(divide(board, 2).values()), expected[1])
+        self.assertEqual(perft(board, 0), 1)
+        with self.assertRaises(ValueError):
+            divide(board, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
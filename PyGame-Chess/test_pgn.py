@@ -0,0 +1,104 @@
+"""Проверки чтения PGN: разбор ходов SAN и одинаковые результаты проверки целиком и по кускам файла.
+
+Запуск:
+    python -m unittest test_pgn
+"""
+import os
+import tempfile
+import unittest
+
+from pgn import *
+
+PGN = b"""[Event "Disambiguation"]
+[White "A"]
+[Black "B"]
+[Result "*"]
+
+1. Nc3 d5 2. Nf3 e5 3. Nd4 a6 4. Ndb5 axb5 *
+
+[Event "Special moves"]
+[White "C"]
+[Black "D"]
+[Result "1-0"]
+
+1. e4 Nf6 2. e5 d5 3. exd6 {en passant} Nc6 4. dxc7 Bd7 5. Nf3 e5 6. Bc4 Bd6
+7. O-O O-O 8. c8=Q Rxc8 (8... Qxc8 9. d3) 9. d3 1-0
+
+[Event "Ambiguous"]
+[Result "*"]
+
+1. Nc3 d5 2. Nf3 e5 3. Nd4 a6 4. Nb5 *
+
+[Event "Illegal"]
+[Result "0-1"]
+
+1. e4 e5 2. Ke3 0-1
+
+[Event "Bad FEN"]
+[FEN "4k3/8/8/8/8/8/8/4K3 w - e3 0 1"]
+[Result "*"]
+
+1. e4 *
+"""
+
+# Ожидаемые результаты партий PGN: (все ходы допустимы, номер недопустимого полухода, полуходов)
+EXPECTED = [
+    (True, None, 8),  # Ход с указанием вертикали (Ndb5)
+    (True, None, 17),  # Взятие на проходе, превращение, рокировки, вариант в скобках
+    (False, 7, 6),  # Неоднозначный ход Nb5
+    (False, 3, 2),  # Недопустимый ход Ke3
+    (False, 0, 0),  # Некорректный тег FEN
+]
+
+
+class SanTest(unittest.TestCase):
+    def test_special_moves(self):
+        board = Board.from_fen("r3k2r/8/8/3pP3/8/8/8/R3K2R w KQkq d6 0 1")
+        self.assertEqual(san_to_move(board, "exd6"), Move(4, 4, 5, 3))
+        self.assertEqual(san_to_move(board, "O-O"), Move(0, 4, 0, 6))
+        self.assertEqual(san_to_move(board, "O-O-O+"), Move(0, 4, 0, 2))
+        board = Board.from_fen("4k3/1P6/8/8/8/8/8/4K3 w - - 0 1")
+        self.assertEqual(san_to_move(board, "b8=N"), Move(6, 1, 7, 1, Knight))
+        self.assertEqual(san_to_move(board, "b8Q+"), Move(6, 1, 7, 1, Queen))
+        self.assertIsNone(san_to_move(board, "b8"))
+
+    def test_disambiguation(self):
+        board = Board.from_fen("4k3/8/8/R7/8/8/8/R3K2N w - - 0 1")
+        self.assertEqual(san_to_move(board, "R1a3"), Move(0, 0, 2, 0))
+        self.assertEqual(san_to_move(board, "R5a3"), Move(4, 0, 2, 0))
+        self.assertIsNone(san_to_move(board, "Ra3"))  # Неоднозначный ход
+        self.assertIsNone(san_to_move(board, "Nh3"))  # Недопустимый ход
+        self.assertEqual(san_to_move(board, "Ng3"), Move(0, 7, 2, 6))
+
+
+class ValidateTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".pgn")
+        with os.fdopen(handle, 'wb') as stream:
+            stream.write(PGN)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_results(self):
+        results = list(validate(self.path))
+        self.assertEqual([(result.legal, result.illegal_ply, result.plies) for result in results], EXPECTED)
+
+    def test_shards(self):
+        """Партии кусков файла любого размера вместе дают те же партии, что и чтение целиком."""
+        with open(self.path, 'rb') as stream:
+            games = list(read_games(stream))
+            for shard_size in (1, 7, 64, 109, 110, 250, len(PGN)):
+                with self.subTest(shard_size=shard_size):
+                    shards = []
+                    for start in range(0, len(PGN), shard_size):
+                        shards.extend(read_games(stream, start, min(start + shard_size, len(PGN))))
+                    self.assertEqual(shards, games)
+
+    def test_parallel(self):
+        serial = list(validate(self.path))
+        self.assertEqual(list(validate(self.path, processes=2, shard_size=64)), serial)
+
+
+if __name__ == "__main__":
+    unittest.main()
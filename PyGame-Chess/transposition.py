@@ -0,0 +1,126 @@
+"""Таблица транспозиций - кеш результатов поиска по ключу позиции (Board.hash).
+
+Таблица имеет фиксированный размер, который задаётся в мегабайтах.
+Записи хранятся в двух массивах array('Q'): ключи и упакованные данные
+(оценка, глубина, тип оценки, возраст и лучший ход), по 16 байт на запись.
+Записи сгруппированы в корзины по две; при нехватке места вытесняется
+запись из более старого поиска, а среди записей одного поиска - менее глубокая.
+"""
+from array import array
+
+from core import *
+
+# Тип сохранённой оценки
+EXACT = 1  # Точная оценка
+LOWER = 2  # Нижняя граница (произошло отсечение по beta)
+UPPER = 3  # Верхняя граница (ни один ход не улучшил alpha)
+
+ENTRY_SIZE = 16  # Байт на запись: ключ и данные
+BUCKET_SIZE = 2  # Записей в корзине
+
+# Расположение полей в 64-битном слове данных
+SCORE_OFFSET = 1 << 31  # Оценка хранится со смещением, поэтому слово данных занятой записи не равно 0
+DEPTH_SHIFT = 32
+FLAG_SHIFT = 40
+AGE_SHIFT = 42
+MOVE_SHIFT = 48
+AGE_MASK = 63
+NO_MOVE = 0x7fff
+
+
+class TranspositionTable:
+    """Таблица транспозиций с ограниченным объёмом памяти."""
+
+    def __init__(self, size_mb=16):
+        entries = max(BUCKET_SIZE, size_mb * 1024 * 1024 // ENTRY_SIZE)
+        # Число корзин - степень двойки, чтобы индекс вычислялся маской
+        buckets = 1 << ((entries // BUCKET_SIZE).bit_length() - 1)
+        self.mask = buckets - 1
+        self.keys = array('Q', bytes(8 * buckets * BUCKET_SIZE))
+        self.data = array('Q', bytes(8 * buckets * BUCKET_SIZE))
+        self.age = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0  # Вытеснения записей других позиций
+
+    def __len__(self):
+        """Число записей, которые помещаются в таблицу."""
+        return len(self.keys)
+
+    def new_search(self):
+        """Начать новый поиск: записи прошлых поисков будут вытесняться в первую очередь."""
+        self.age = (self.age + 1) & AGE_MASK
+
+    def clear(self):
+        """Очистить таблицу и счётчики."""
+        size = len(self.keys)
+        self.keys = array('Q', bytes(8 * size))
+        self.data = array('Q', bytes(8 * size))
+        self.hits = self.misses = self.stores = self.overwrites = 0
+
+    def probe(self, key):
+        """Найти запись для позиции с ключом key.
+        Возвращает кортеж (глубина, тип оценки, оценка, ход или None) или None, если записи нет."""
+        index = (key & self.mask) * BUCKET_SIZE
+        for i in range(index, index + BUCKET_SIZE):
+            if self.keys[i] == key and self.data[i]:
+                self.hits += 1
+                data = self.data[i]
+                move = data >> MOVE_SHIFT & NO_MOVE
+                return (data >> DEPTH_SHIFT & 255, data >> FLAG_SHIFT & 3, (data & 0xffffffff) - SCORE_OFFSET,
+                        unpack_move(move) if move != NO_MOVE else None)
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, flag, score, move):
+        """Сохранить результат поиска позиции с ключом key."""
+        index = (key & self.mask) * BUCKET_SIZE
+        data = (score + SCORE_OFFSET | min(depth, 255) << DEPTH_SHIFT | flag << FLAG_SHIFT |
+                self.age << AGE_SHIFT | (pack_move(move) if move else NO_MOVE) << MOVE_SHIFT)
+
+        # Запись этой же позиции заменяется, если новый поиск не менее глубокий или старая запись устарела
+        victim = None
+        for i in range(index, index + BUCKET_SIZE):
+            if self.keys[i] == key and self.data[i]:
+                old = self.data[i]
+                if depth < (old >> DEPTH_SHIFT & 255) and (old >> AGE_SHIFT & AGE_MASK) == self.age:
+                    return
+                victim = i
+                break
+
+        # Иначе выбираем пустую запись, запись прошлого поиска или наименее глубокую
+        if victim is None:
+            best = None
+            for i in range(index, index + BUCKET_SIZE):
+                old = self.data[i]
+                if not old:
+                    victim = i
+                    break
+                priority = ((old >> AGE_SHIFT & AGE_MASK) == self.age, old >> DEPTH_SHIFT & 255)
+                if best is None or priority < best:
+                    best = priority
+                    victim = i
+            if self.data[victim]:
+                self.overwrites += 1
+
+        self.keys[victim] = key
+        self.data[victim] = data
+        self.stores += 1
+
+    def usage(self):
+        """Доля занятых записей (по первой тысяче записей)."""
+        sample = self.data[:1000]
+        return sum(1 for data in sample if data) / len(sample)
+
+    def stats(self):
+        """Счётчики использования таблицы."""
+        return {
+            "size": len(self.keys),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+            "usage": self.usage()
+        }